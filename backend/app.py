@@ -1,34 +1,340 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 from patterns.singleton import SystemConfig
-from patterns.factory import AIModelFactory
+from patterns.factory import AIModelFactory, inflight_tasks, set_stage_recorder
 from patterns.strategy import AIContext
-from patterns.observer import ResultObserver, ResultSubject
+from engines.forecasting import forecaster
+from engines.images import image_store
+from patterns.observer import ResultObserver, ResultSubject, StatsAggregator
+from services.datasets import DatasetError, DatasetNotFound, DatasetStore
+from services.events import EventHub, StreamObserver
+from services.export import FORMATS, SECTIONS, StreamingExporter
+from services.http_cache import ResponseCache
+from services.jobs import JobManager, JobQueueFull
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from services.monitor import ResourceSampler
+from services.serialization import NumpyJSONProvider, encode, negotiate, project
+from services.storage import create_storage
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
+import os
 import time
 import json
 
 app = Flask(__name__)
 CORS(app)
+# 结果中的NumPy数组由JSON provider直接编码；RESULT_PRECISION设置默认浮点精度
+app.json = NumpyJSONProvider(app)
+RESULT_PRECISION = int(os.environ['RESULT_PRECISION']) if os.environ.get('RESULT_PRECISION') else None
+app.json.precision = RESULT_PRECISION
+
+# 共享状态模式：多个worker进程通过SQLite共享配置、历史、日志和最新结果
+SHARED_STATE = os.environ.get('SHARED_STATE', '0') == '1'
+
+storage = create_storage(
+    backend='sqlite' if SHARED_STATE else os.environ.get('STORAGE_BACKEND', 'memory'),
+    path=os.environ.get('STORAGE_PATH'),
+    history_capacity=int(os.environ.get('HISTORY_CAPACITY', 10000)),
+    log_capacity=int(os.environ.get('LOG_CAPACITY', 100000))
+)
+if SHARED_STATE:
+    SystemConfig.get_instance().attach_store(storage.kv)
+
+# 观察者默认异步分发，/api/run只需入队；OBSERVER_DISPATCH=sync恢复同步调用
+result_subject = ResultSubject(
+    mode=os.environ.get('OBSERVER_DISPATCH', 'async'),
+    queue_size=int(os.environ.get('OBSERVER_QUEUE_SIZE', 1024)),
+    workers=int(os.environ.get('OBSERVER_WORKERS', 1)),
+    overflow=os.environ.get('OBSERVER_OVERFLOW', 'drop_oldest'),
+    on_error=lambda observer, e: add_log('error', f'观察者{type(observer).__name__}处理结果失败: {str(e)}')
+)
+# 最新结果和统计在写入历史时同步更新，/api/run返回后/api/results立即可见，
+# 也不经过可能丢弃结果的异步队列；
+result_observer = ResultObserver(store=storage.kv if SHARED_STATE else None)
+# 持久化存储的历史在重启和多worker间保留，统计直接由存储聚合
+stats_aggregator = None if storage.persistent else StatsAggregator()
+
+# SSE推送：结果、日志和统计变化实时推送给订阅的前端
+event_hub = EventHub(
+    backlog=int(os.environ.get('STREAM_BACKLOG', 1000)),
+    client_queue=int(os.environ.get('STREAM_CLIENT_QUEUE', 256)),
+    max_clients=int(os.environ.get('STREAM_MAX_CLIENTS', 100))
+)
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+stream_observer = StreamObserver(event_hub, stats=lambda: build_stats())
+result_subject.attach(stream_observer)
+
+history_store = storage.history
+if stats_aggregator is not None:
+    history_store.add_listener(stats_aggregator.remove)
+
+def publish_history_removed(entry, reason=None):
+    # 环形缓冲区淘汰不推送，只通知手动删除
+    if reason == 'delete':
+        event_hub.publish('history_removed', {'id': entry['id']})
+        stream_observer.publish_stats()
+
+history_store.add_listener(publish_history_removed)
+log_store = storage.logs
+log_store.add_listener(lambda entry: event_hub.publish('log', entry))
+data_records = storage.data_records
+# 上传的数据集转换为本地.npy文件，模型通过内存映射读取
+datasets = DatasetStore(os.environ.get('DATASET_DIR', os.path.join('data', 'datasets')), data_records)
+exporter = StreamingExporter({
+    'history': lambda since, until: history_store.iter_entries(since=since, until=until),
+    'logs': lambda since, until: log_store.iter_entries(since=since, until=until)
+})
+
+STAGE_LABELS = {
+    'load_data': '数据加载',
+    'preprocess': '数据预处理',
+    'inference': 'AI推理',
+    'output_result': '结果生成'
+}
+
+job_manager = JobManager(
+    max_workers=int(os.environ.get('JOB_WORKERS', 4)),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', 32)),
+    store=storage.kv if SHARED_STATE else None
+)
+resource_sampler = ResourceSampler(
+    interval=float(os.environ.get('MONITOR_INTERVAL', 5)),
+    size=int(os.environ.get('MONITOR_SAMPLES', 60)),
+    probes={
+        'model_pool_bytes': lambda: AIModelFactory().pool.nbytes(),
+        'image_store_bytes': image_store.nbytes,
+        'inflight_tasks': inflight_tasks.value
+    }
+)
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+# 阶段内存分配由tracemalloc测量(NumPy数组也计入)，跟踪所有分配开销较大，默认关闭
+METRICS_TRACE_ALLOCATIONS = os.environ.get('METRICS_TRACE_ALLOCATIONS', '0') == '1'
+metrics = MetricsRegistry()
+stage_duration = metrics.histogram(
+    'ai_stage_duration_seconds', 'Duration of each AIModel stage', ('task', 'strategy', 'stage')
+)
+stage_allocated_bytes = metrics.counter(
+    'ai_stage_allocated_bytes_total',
+    'Peak bytes allocated during each AIModel stage, traced by tracemalloc (METRICS_TRACE_ALLOCATIONS=1)',
+    ('task', 'strategy', 'stage')
+)
+http_requests = metrics.counter('http_requests_total', 'HTTP requests by route and status', ('method', 'endpoint', 'status'))
+http_errors = metrics.counter('http_request_errors_total', 'HTTP requests that failed with a server error', ('method', 'endpoint'))
+http_duration = metrics.histogram('http_request_duration_seconds', 'HTTP request latency by route', ('method', 'endpoint'))
+metrics.gauge('ai_inflight_tasks', 'Tasks currently executing', function=inflight_tasks.value)
+metrics.gauge('model_pool_bytes', 'Array bytes held by the warm model pool', function=lambda: AIModelFactory().pool.nbytes())
+metrics.gauge('observer_queue_depth', 'Results waiting for observer dispatch', function=lambda: result_subject.stats()['queued'])
+metrics.gauge(
+    'observer_dispatch_lag_seconds', 'Delay between enqueue and dispatch of the last result',
+    function=lambda: (result_subject.stats()['last_lag_ms'] or 0) / 1000
+)
+metrics.counter('observer_dropped_total', 'Results dropped by the observer queue overflow policy',
+                function=lambda: result_subject.stats()['dropped'])
+metrics.counter('observer_errors_total', 'Exceptions raised by observers',
+                function=lambda: sum(result_subject.stats()['errors'].values()))
+
+def record_stage(task_type, strategy_id, stage, seconds, allocated_bytes):
+    stage_duration.observe(seconds, task=task_type, strategy=strategy_id, stage=stage)
+    if allocated_bytes:
+        stage_allocated_bytes.inc(allocated_bytes, task=task_type, strategy=strategy_id, stage=stage)
+
+def request_endpoint():
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+if METRICS_ENABLED:
+    set_stage_recorder(record_stage, allocations=METRICS_TRACE_ALLOCATIONS)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        endpoint = request_endpoint()
+        http_requests.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        http_duration.observe(time.perf_counter() - g.request_started, method=request.method, endpoint=endpoint)
+        if response.status_code >= 500:
+            http_errors.inc(method=request.method, endpoint=endpoint)
+        g.request_recorded = True
+        return response
+
+    @app.teardown_request
+    def record_request_error(exc):
+        # 异常未经after_request处理时在此补记
+        if exc is not None and not g.get('request_recorded'):
+            endpoint = request_endpoint()
+            http_requests.inc(method=request.method, endpoint=endpoint, status=500)
+            http_errors.inc(method=request.method, endpoint=endpoint)
+
+# 任务和策略目录只在部署时变化，响应体序列化一次后缓存，按ETag返回304
+response_cache = ResponseCache()
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 300))
+
+TASK_CATALOG = [
+    {
+        'id': 'prediction',
+        'name': '数据预测',
+        'icon': '📈',
+        'description': '基于历史数据进行未来趋势预测',
+        'category': '时序分析',
+        'difficulty': 'medium'
+    },
+    {
+        'id': 'classification',
+        'name': '图像分类',
+        'icon': '🖼️',
+        'description': '对图像进行智能分类识别',
+        'category': '计算机视觉',
+        'difficulty': 'hard'
+    },
+    {
+        'id': 'recommendation',
+        'name': '智能推荐',
+        'icon': '🎯',
+        'description': '基于用户行为的个性化推荐',
+        'category': '推荐系统',
+        'difficulty': 'medium'
+    },
+    {
+        'id': 'anomaly',
+        'name': '异常检测',
+        'icon': '🔍',
+        'description': '检测数据中的异常模式',
+        'category': '异常分析',
+        'difficulty': 'easy'
+    }
+]
+
+STRATEGY_CATALOG = [
+    {
+        'id': 'baseline',
+        'name': '基础模型',
+        'description': '使用传统机器学习算法，快速高效',
+        'accuracy': 0.75,
+        'speed': 'fast',
+        'memory': 'low',
+        'complexity': 'low'
+    },
+    {
+        'id': 'deep_learning',
+        'name': '深度学习模型',
+        'description': '使用神经网络，准确度高',
+        'accuracy': 0.88,
+        'speed': 'medium',
+        'memory': 'medium',
+        'complexity': 'medium'
+    },
+    {
+        'id': 'attention',
+        'name': 'Attention增强模型',
+        'description': '结合注意力机制，性能卓越',
+        'accuracy': 0.92,
+        'speed': 'medium',
+        'memory': 'high',
+        'complexity': 'high'
+    },
+    {
+        'id': 'ensemble',
+        'name': '集成学习模型',
+        'description': '多模型融合，准确度最高',
+        'accuracy': 0.95,
+        'speed': 'slow',
+        'memory': 'high',
+        'complexity': 'high'
+    }
+]
 
-result_subject = ResultSubject()
-result_observer = ResultObserver()
-result_subject.attach(result_observer)
-
-task_history = []
-system_logs = []
-data_records = []
+BATCH_MAX_RUNS = int(os.environ.get('BATCH_MAX_RUNS', 200))
+compare_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('COMPARE_WORKERS', 4)),
+    thread_name_prefix='compare-worker'
+)
 
 def add_log(level, message):
-    log_entry = {
-        'id': len(system_logs) + 1,
-        'timestamp': datetime.now().isoformat(),
-        'level': level,
-        'message': message
-    }
-    system_logs.append(log_entry)
-    if len(system_logs) > 100:
-        system_logs.pop(0)
+    return log_store.append(level, message)
+
+def parse_seed(data):
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        raise ValueError('seed必须是非负整数')
+    return seed
+
+def session_id():
+    # 客户端通过X-Session-Id使用独立的会话配置，未提供时读写全局配置
+    return request.headers.get('X-Session-Id') or None
+
+def parse_fields():
+    fields = request.args.get('fields')
+    return [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+def result_response(payload, status=200):
+    # Accept协商编码格式(JSON/MessagePack/float32二进制)，?precision=控制浮点位数
+    mimetype = negotiate(request.accept_mimetypes)
+    precision = request.args.get('precision', RESULT_PRECISION, type=int)
+    if precision is not None:
+        precision = max(0, min(15, precision))
+    return Response(encode(payload, mimetype, precision), status=status, mimetype=mimetype)
+
+def open_dataset(data):
+    # dataset_id为空时返回None，模型使用模拟数据
+    dataset_id = data.get('dataset_id')
+    if dataset_id is None:
+        return None
+    if not isinstance(dataset_id, int) or isinstance(dataset_id, bool):
+        raise DatasetError('dataset_id必须是整数')
+    return datasets.open(dataset_id)
+
+def parse_run_params(data):
+    if not isinstance(data, dict):
+        raise ValueError('任务参数必须是JSON对象')
+    task_type = data.get('task', 'prediction')
+    strategy_id = data.get('strategy', 'baseline')
+    return task_type, strategy_id, parse_seed(data)
+
+def record_executions(executions):
+    history_entries = history_store.add_many([
+        {
+            'task': task_type,
+            'strategy': strategy_id,
+            'timestamp': datetime.now().isoformat(),
+            'accuracy': result['metrics']['accuracy'],
+            'latency_ms': latency_ms,
+            'status': 'completed'
+        }
+        for task_type, strategy_id, result, latency_ms in executions
+    ])
+    if stats_aggregator is not None:
+        for entry in history_entries:
+            stats_aggregator.add(entry)
+    # 结果附带执行信息；最新结果同步写入，SSE等较慢的观察者经队列分发
+    results = [dict(result, execution=entry) for (_, _, result, _), entry in zip(executions, history_entries)]
+    result_observer.update_many(results)
+    for result in results:
+        result_subject.set_result(result)
+    return history_entries
+
+def record_execution(task_type, strategy_id, result, latency_ms):
+    history_entry = record_executions([(task_type, strategy_id, result, latency_ms)])[0]
+    add_log('success', f'任务执行成功: {task_type}')
+    return history_entry
+
+def run_job(job):
+    task_type = job.params['task']
+    strategy_id = job.params['strategy']
+    start = time.perf_counter()
+    model = AIModelFactory().create_model(task_type)
+    context = AIContext(strategy_id, seed=job.params['seed'])
+    result = model.execute(context, on_stage=job.on_stage)
+    latency_ms = round((time.perf_counter() - start) * 1000, 3)
+    history_entry = record_execution(task_type, strategy_id, result, latency_ms)
+    return {'result': result, 'execution_id': history_entry['id']}
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    body = metrics.render() if METRICS_ENABLED else '# metrics disabled\n'
+    return Response(body, content_type=METRICS_CONTENT_TYPE)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -41,200 +347,285 @@ def health_check():
 
 @app.route('/api/config', methods=['GET'])
 def get_config():
-    config = SystemConfig.get_instance()
-    return jsonify({
-        'current_task': config.get_current_task(),
-        'current_strategy': config.get_current_strategy(),
+    session = session_id()
+    snapshot = SystemConfig.get_instance().snapshot(session)
+    # 会话配置各不相同，不进入共享缓存，只计算ETag
+    return response_cache.respond(None if session else 'config', lambda: {
+        'current_task': snapshot.current_task,
+        'current_strategy': snapshot.current_strategy,
         'system_name': 'Intelligent Decision System',
         'version': '1.0.0'
-    })
+    }, version=snapshot.version)
 
 @app.route('/api/config/task', methods=['POST'])
 def set_task():
     data = request.get_json()
-    config = SystemConfig.get_instance()
-    config.set_current_task(data.get('task'))
+    snapshot = SystemConfig.get_instance().update(session_id(), current_task=data.get('task'))
     add_log('info', f'任务设置为: {data.get("task")}')
-    return jsonify({'status': 'success', 'task': config.get_current_task()})
+    return jsonify({'status': 'success', 'task': snapshot.current_task})
 
 @app.route('/api/config/strategy', methods=['POST'])
 def set_strategy():
     data = request.get_json()
-    config = SystemConfig.get_instance()
-    config.set_current_strategy(data.get('strategy'))
+    snapshot = SystemConfig.get_instance().update(session_id(), current_strategy=data.get('strategy'))
     add_log('info', f'策略设置为: {data.get("strategy")}')
-    return jsonify({'status': 'success', 'strategy': config.get_current_strategy()})
+    return jsonify({'status': 'success', 'strategy': snapshot.current_strategy})
 
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    tasks = [
-        {
-            'id': 'prediction',
-            'name': '数据预测',
-            'icon': '📈',
-            'description': '基于历史数据进行未来趋势预测',
-            'category': '时序分析',
-            'difficulty': 'medium'
-        },
-        {
-            'id': 'classification',
-            'name': '图像分类',
-            'icon': '🖼️',
-            'description': '对图像进行智能分类识别',
-            'category': '计算机视觉',
-            'difficulty': 'hard'
-        },
-        {
-            'id': 'recommendation',
-            'name': '智能推荐',
-            'icon': '🎯',
-            'description': '基于用户行为的个性化推荐',
-            'category': '推荐系统',
-            'difficulty': 'medium'
-        },
-        {
-            'id': 'anomaly',
-            'name': '异常检测',
-            'icon': '🔍',
-            'description': '检测数据中的异常模式',
-            'category': '异常分析',
-            'difficulty': 'easy'
-        }
-    ]
-    return jsonify(tasks)
+    return response_cache.respond('tasks', lambda: TASK_CATALOG, max_age=CATALOG_MAX_AGE)
 
 @app.route('/api/strategies', methods=['GET'])
 def get_strategies():
-    strategies = [
-        {
-            'id': 'baseline',
-            'name': '基础模型',
-            'description': '使用传统机器学习算法，快速高效',
-            'accuracy': 0.75,
-            'speed': 'fast',
-            'memory': 'low',
-            'complexity': 'low'
-        },
-        {
-            'id': 'deep_learning',
-            'name': '深度学习模型',
-            'description': '使用神经网络，准确度高',
-            'accuracy': 0.88,
-            'speed': 'medium',
-            'memory': 'medium',
-            'complexity': 'medium'
-        },
-        {
-            'id': 'attention',
-            'name': 'Attention增强模型',
-            'description': '结合注意力机制，性能卓越',
-            'accuracy': 0.92,
-            'speed': 'medium',
-            'memory': 'high',
-            'complexity': 'high'
-        },
-        {
-            'id': 'ensemble',
-            'name': '集成学习模型',
-            'description': '多模型融合，准确度最高',
-            'accuracy': 0.95,
-            'speed': 'slow',
-            'memory': 'high',
-            'complexity': 'high'
-        }
-    ]
-    return jsonify(strategies)
+    return response_cache.respond('strategies', lambda: STRATEGY_CATALOG, max_age=CATALOG_MAX_AGE)
 
 @app.route('/api/run', methods=['POST'])
 def run_model():
     data = request.get_json()
-    task_type = data.get('task', 'prediction')
-    strategy_id = data.get('strategy', 'baseline')
+    try:
+        task_type, strategy_id, seed = parse_run_params(data)
+        dataset = open_dataset(data)
+        model = AIModelFactory().create_model(task_type, dataset=dataset)
+    except DatasetNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
-    config = SystemConfig.get_instance()
-    config.set_current_task(task_type)
-    config.set_current_strategy(strategy_id)
+    SystemConfig.get_instance().update(session_id(), current_task=task_type, current_strategy=strategy_id)
 
-    factory = AIModelFactory()
-    model = factory.create_model(task_type)
-    context = AIContext(strategy_id)
+    context = AIContext(strategy_id, seed=seed)
 
     add_log('info', f'开始执行任务: {task_type}, 策略: {strategy_id}')
 
     progress_updates = []
-    for step in ['数据加载', '数据预处理', 'AI推理', '结果生成']:
-        progress_updates.append({'step': step, 'status': 'completed'})
+    stage_started = {}
+
+    def on_stage(stage, status):
+        if status == 'running':
+            stage_started[stage] = time.perf_counter()
+        elif status == 'cached':
+            progress_updates.append({'step': STAGE_LABELS[stage], 'status': status, 'duration_ms': 0.0})
+        else:
+            progress_updates.append({
+                'step': STAGE_LABELS[stage],
+                'status': status,
+                'duration_ms': round((time.perf_counter() - stage_started[stage]) * 1000, 3)
+            })
+
+    start = time.perf_counter()
+    result = model.execute(context, on_stage=on_stage)
+    latency_ms = round((time.perf_counter() - start) * 1000, 3)
+    history_entry = record_execution(task_type, strategy_id, result, latency_ms)
+
+    return result_response({
+        'status': 'success',
+        'progress': progress_updates,
+        'result': project(result, parse_fields()),
+        'execution_id': history_entry['id'],
+        'seed': seed,
+        'dataset_id': dataset.id if dataset is not None else None
+    })
 
-    result = model.execute(context)
-    result_subject.set_result(result)
+@app.route('/api/run/batch', methods=['POST'])
+def run_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': '请求体必须是JSON对象'}), 400
+    runs = data.get('runs', [])
+    include_results = bool(data.get('include_results', False))
+    if not isinstance(runs, list) or not runs:
+        return jsonify({'status': 'error', 'message': 'runs不能为空'}), 400
+    if len(runs) > BATCH_MAX_RUNS:
+        return jsonify({'status': 'error', 'message': f'单次批量最多 {BATCH_MAX_RUNS} 个任务'}), 400
+    try:
+        params = [parse_run_params(run) for run in runs]
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    # 按任务分组，每个数据集只加载一次，组内策略并行推理
+    groups = {}
+    for index, (task_type, strategy_id, seed) in enumerate(params):
+        groups.setdefault(task_type, []).append((index, strategy_id, seed))
+
+    results = [None] * len(params)
+    factory = AIModelFactory()
+    for task_type, items in groups.items():
+        model = factory.create_model(task_type)
+        if not model.prepared:
+            model.prepare()
+
+        def run_item(item, model=model):
+            index, strategy_id, seed = item
+            start = time.perf_counter()
+            result = model.fork().infer(AIContext(strategy_id, seed=seed))
+            return index, result, round((time.perf_counter() - start) * 1000, 3)
+
+        for index, result, latency_ms in compare_executor.map(run_item, items):
+            results[index] = (result, latency_ms)
+
+    last_task, last_strategy, _ = params[-1]
+    SystemConfig.get_instance().update(session_id(), current_task=last_task, current_strategy=last_strategy)
+
+    history_entries = record_executions([
+        (task_type, strategy_id, result, latency_ms)
+        for (task_type, strategy_id, _), (result, latency_ms) in zip(params, results)
+    ])
+    add_log('success', f'批量任务执行成功，共 {len(params)} 个任务，{len(groups)} 个数据集')
+
+    fields = parse_fields()
+    payload = []
+    for (task_type, strategy_id, seed), (result, _), entry in zip(params, results, history_entries):
+        item = {
+            'execution_id': entry['id'],
+            'task': task_type,
+            'strategy': strategy_id,
+            'seed': seed,
+            'accuracy': result['metrics']['accuracy'],
+            'confidence': result['predictions']['confidence']
+        }
+        if include_results:
+            item['result'] = project(result, fields)
+        payload.append(item)
 
-    history_entry = {
-        'id': len(task_history) + 1,
-        'task': task_type,
-        'strategy': strategy_id,
-        'timestamp': datetime.now().isoformat(),
-        'accuracy': result['metrics']['accuracy'],
-        'status': 'completed'
-    }
-    task_history.append(history_entry)
-    if len(task_history) > 50:
-        task_history.pop(0)
+    return result_response({'status': 'success', 'count': len(payload), 'results': payload})
 
-    add_log('success', f'任务执行成功: {task_type}')
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+    try:
+        task_type, strategy_id, seed = parse_run_params(data)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    SystemConfig.get_instance().update(session_id(), current_task=task_type, current_strategy=strategy_id)
+
+    params = {'task': task_type, 'strategy': strategy_id, 'seed': seed}
+    try:
+        job = job_manager.submit(run_job, params, AIModelFactory.stages(), STAGE_LABELS)
+    except JobQueueFull:
+        add_log('error', f'任务队列已满，拒绝任务: {task_type}')
+        return jsonify({'status': 'error', 'message': '任务队列已满，请稍后重试'}), 429
+
+    add_log('info', f'提交异步任务: {task_type}, 策略: {strategy_id}')
+    return jsonify({'status': 'accepted', 'job_id': job.id, 'job': job.to_dict(include_result=False)}), 202
 
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    limit = int(request.args.get('limit', 50))
     return jsonify({
-        'status': 'success',
-        'progress': progress_updates,
-        'result': result,
-        'execution_id': history_entry['id']
+        'pool': job_manager.stats(),
+        'data': job_manager.list(limit)
     })
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.snapshot(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    add_log('info', f'取消异步任务: {job_id}')
+    return jsonify(job)
+
 @app.route('/api/results', methods=['GET'])
 def get_results():
-    return jsonify(result_observer.get_latest_result())
+    return result_response(project(result_observer.get_latest_result(), parse_fields()))
 
 @app.route('/api/results/compare', methods=['POST'])
 def compare_results():
     data = request.get_json()
     strategies = data.get('strategies', [])
+    try:
+        seed = parse_seed(data)
+        dataset = open_dataset(data)
+    except DatasetNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    # 整个请求只读取一次配置快照，不受其他请求并发修改影响
+    snapshot = SystemConfig.get_instance().snapshot(session_id())
+    task_type = data.get('task') or snapshot.current_task or 'prediction'
+
+    # 数据只加载和预处理一次，各策略在共享数组上并行推理
+    seed_sequence = np.random.SeedSequence(seed)
+    try:
+        model = AIModelFactory().create_model(task_type, dataset=dataset)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    if not model.prepared:
+        model.prepare(np.random.default_rng(seed_sequence))
+
+    fields = parse_fields()
+
+    def run_strategy(strategy_id, strategy_seed):
+        start = time.perf_counter()
+        context = AIContext(strategy_id, seed=strategy_seed)
+        result = model.fork().infer(context)
+        return {
+            'strategy': strategy_id,
+            'result': project(result, fields),
+            'latency_ms': round((time.perf_counter() - start) * 1000, 3)
+        }
 
-    comparison_data = []
-    for strategy_id in strategies:
-        context = AIContext(strategy_id)
-        config = SystemConfig.get_instance()
-        task_type = config.get_current_task() or 'prediction'
+    futures = [
+        compare_executor.submit(run_strategy, strategy_id, strategy_seed)
+        for strategy_id, strategy_seed in zip(strategies, seed_sequence.spawn(len(strategies)))
+    ]
+    comparison_data = [future.result() for future in futures]
 
-        factory = AIModelFactory()
-        model = factory.create_model(task_type)
-        result = model.execute(context)
+    add_log('info', f'策略对比完成，共对比 {len(strategies)} 个策略')
+    return result_response(comparison_data)
+
+@app.route('/api/prediction/points', methods=['POST'])
+def append_prediction_points():
+    data = request.get_json() or {}
+    try:
+        count = forecaster.append(data.get('points', []))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    # 追加后只基于滚动窗口重新预测，不重新处理全部历史
+    stats = forecaster.stats()
+    return jsonify({
+        'status': 'success',
+        'count': count,
+        'window': stats['window'],
+        'mean': stats['mean'],
+        'std': stats['std'],
+        'forecast': forecaster.forecast()
+    })
 
-        comparison_data.append({
-            'strategy': strategy_id,
-            'result': result
-        })
+@app.route('/api/models/pool', methods=['GET'])
+def get_model_pool():
+    return jsonify(AIModelFactory().pool.stats())
 
-    add_log('info', f'策略对比完成，共对比 {len(strategies)} 个策略')
-    return jsonify(comparison_data)
+@app.route('/api/models/pool', methods=['DELETE'])
+def clear_model_pool():
+    AIModelFactory().pool.clear()
+    add_log('info', '清空模型池')
+    return jsonify({'status': 'success', 'message': 'Model pool cleared'})
 
 @app.route('/api/history', methods=['GET'])
 def get_history():
     page = int(request.args.get('page', 1))
     page_size = int(request.args.get('page_size', 10))
 
-    start = (page - 1) * page_size
-    end = start + page_size
-
     return jsonify({
-        'total': len(task_history),
+        'total': len(history_store),
         'page': page,
         'page_size': page_size,
-        'data': list(reversed(task_history))[start:end]
+        'data': history_store.page((page - 1) * page_size, page_size)
     })
 
 @app.route('/api/history/<int:task_id>', methods=['DELETE'])
 def delete_history(task_id):
-    global task_history
-    task_history = [h for h in task_history if h['id'] != task_id]
+    history_store.delete(task_id)
     add_log('info', f'删除历史记录: {task_id}')
     return jsonify({'status': 'success', 'message': 'History deleted'})
 
@@ -242,104 +633,199 @@ def delete_history(task_id):
 def get_logs():
     level = request.args.get('level', None)
     limit = int(request.args.get('limit', 50))
+    since_id = request.args.get('since_id', None)
+    since_id = int(since_id) if since_id is not None else None
 
-    logs = system_logs
-    if level:
-        logs = [log for log in logs if log['level'] == level]
+    total, logs, cursor, has_more = log_store.query(level=level, limit=limit, since_id=since_id)
 
     return jsonify({
-        'total': len(logs),
-        'data': list(reversed(logs))[:limit]
+        'total': total,
+        'data': logs,
+        'last_id': cursor,
+        'has_more': has_more
     })
 
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    # EventSource断线重连时会自动带上Last-Event-ID
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID必须是整数'}), 400
+
+    subscription = event_hub.subscribe(last_event_id)
+    if subscription is None:
+        return jsonify({'error': '订阅连接数已达上限'}), 503, {'Retry-After': '30'}
+    return Response(
+        subscription.stream(STREAM_HEARTBEAT),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    completed_count = len([h for h in task_history if h['status'] == 'completed'])
+    return jsonify(build_stats())
 
-    if task_history:
-        avg_accuracy = sum(h['accuracy'] for h in task_history) / len(task_history)
-    else:
-        avg_accuracy = 0
+def build_stats():
+    snapshot = history_store.aggregate() if stats_aggregator is None else stats_aggregator.snapshot()
+    avg_accuracy = snapshot['avg_accuracy']
 
-    task_distribution = {}
-    for h in task_history:
-        task_type = h['task']
-        task_distribution[task_type] = task_distribution.get(task_type, 0) + 1
-
-    return jsonify({
+    return {
         'total_tasks': 4,
-        'completed_tasks': completed_count,
-        'total_executions': len(task_history),
+        'completed_tasks': snapshot['completed'],
+        'total_executions': snapshot['count'],
         'strategies': 4,
         'avg_accuracy': round(avg_accuracy * 100, 1) if avg_accuracy else 87.5,
-        'task_distribution': task_distribution,
+        'task_distribution': snapshot['task_distribution'],
+        'strategy_distribution': snapshot['strategy_distribution'],
+        'latency_ms': snapshot['latency_ms'],
         'system_uptime': '正常运行',
         'memory_usage': '正常'
-    })
+    }
 
 @app.route('/api/data', methods=['GET'])
 def get_data_records():
+    records = data_records.list()
     return jsonify({
-        'total': len(data_records),
-        'data': data_records
+        'total': len(records),
+        'data': records
     })
 
 @app.route('/api/data', methods=['POST'])
 def create_data_record():
     data = request.get_json()
-    record = {
-        'id': len(data_records) + 1,
+    record = data_records.add({
         'name': data.get('name'),
         'type': data.get('type'),
         'size': data.get('size'),
         'created_at': datetime.now().isoformat()
-    }
-    data_records.append(record)
+    })
     add_log('info', f'创建数据记录: {record["name"]}')
     return jsonify({'status': 'success', 'data': record})
 
 @app.route('/api/data/<int:data_id>', methods=['DELETE'])
 def delete_data_record(data_id):
-    global data_records
-    data_records = [d for d in data_records if d['id'] != data_id]
+    record = data_records.delete(data_id)
+    if record is not None and record.get('type') == 'dataset':
+        datasets.delete(data_id)
+        AIModelFactory().pool.discard_dataset(data_id)
     add_log('info', f'删除数据记录: {data_id}')
     return jsonify({'status': 'success', 'message': 'Data deleted'})
 
-@app.route('/api/export', methods=['POST'])
+@app.route('/api/datasets', methods=['POST'])
+def create_dataset():
+    data = request.get_json() or {}
+    try:
+        record = datasets.create(
+            data.get('name'),
+            data.get('format', 'csv'),
+            dtype=data.get('dtype', 'float32'),
+            header=data.get('header', False)
+        )
+    except DatasetError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    add_log('info', f'创建数据集: {record["name"]}')
+    return jsonify({'status': 'success', 'data': record}), 201
+
+@app.route('/api/datasets/<int:dataset_id>', methods=['GET'])
+def get_dataset(dataset_id):
+    try:
+        return jsonify(datasets.get(dataset_id))
+    except DatasetNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+
+@app.route('/api/datasets/<int:dataset_id>/chunks', methods=['POST'])
+def upload_dataset_chunk(dataset_id):
+    # 请求体为原始字节，按块读取写入磁盘；?offset= 为该块在文件中的起始位置
+    try:
+        record = datasets.append_chunk(dataset_id, request.stream, request.args.get('offset', None, type=int))
+    except DatasetNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except DatasetError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    return jsonify({'status': 'success', 'uploaded_bytes': record['uploaded_bytes']})
+
+@app.route('/api/datasets/<int:dataset_id>/complete', methods=['POST'])
+def complete_dataset(dataset_id):
+    try:
+        record = datasets.complete(dataset_id)
+    except DatasetNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except DatasetError as e:
+        add_log('error', f'数据集转换失败: {dataset_id}')
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    add_log('success', f'数据集就绪: {record["name"]}, 形状: {record["shape"]}')
+    return jsonify({'status': 'success', 'data': record})
+
+@app.route('/api/export', methods=['GET', 'POST'])
 def export_data():
-    data = request.get_json()
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+    else:
+        data = request.args.to_dict()
     export_type = data.get('type', 'json')
-
-    export_data = {
+    if export_type not in FORMATS:
+        return jsonify({'status': 'error', 'message': f'不支持的导出格式: {export_type}'}), 400
+
+    sections = data.get('sections') or list(SECTIONS)
+    if isinstance(sections, str):
+        sections = [section for section in sections.split(',') if section]
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        return jsonify({'status': 'error', 'message': f'未知的导出内容: {", ".join(unknown)}'}), 400
+    compress = str(data.get('gzip', '')).lower() in ('1', 'true', 'yes')
+
+    snapshot = SystemConfig.get_instance().snapshot(session_id())
+    meta = {
         'timestamp': datetime.now().isoformat(),
         'config': {
-            'task': SystemConfig.get_instance().get_current_task(),
-            'strategy': SystemConfig.get_instance().get_current_strategy()
-        },
-        'history': task_history,
-        'logs': system_logs
+            'task': snapshot.current_task,
+            'strategy': snapshot.current_strategy
+        }
     }
 
     add_log('info', f'导出数据，格式: {export_type}')
 
-    return jsonify({
-        'status': 'success',
-        'data': export_data,
-        'format': export_type
-    })
+    # 生成器逐块输出，避免一次性在内存中构造完整导出内容
+    chunks = exporter.stream(
+        export_type, meta, sections=sections,
+        since=data.get('since'), until=data.get('until'), compress=compress
+    )
+    content_type, extension = FORMATS[export_type]
+    filename = f'export-{datetime.now().strftime("%Y%m%d%H%M%S")}.{extension}'
+    response = Response(stream_with_context(chunks), content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/api/system/status', methods=['GET'])
 def system_status():
+    resource_sampler.ensure_running()
+    sample = resource_sampler.latest() or {}
+    rss_bytes = sample.get('rss_bytes')
+    cpu_percent = sample.get('cpu_percent')
+    limit = request.args.get('samples', None)
+
     return jsonify({
         'status': 'running',
         'uptime': '正常运行',
-        'cpu_usage': '15%',
-        'memory_usage': '256 MB',
-        'active_tasks': len(task_history),
-        'total_logs': len(system_logs),
-        'last_execution': task_history[-1] if task_history else None
+        'cpu_usage': f'{cpu_percent}%' if cpu_percent is not None else '采样中',
+        'memory_usage': f'{rss_bytes / 1024 / 1024:.0f} MB' if rss_bytes is not None else '未知',
+        'active_tasks': inflight_tasks.value(),
+        'queued_jobs': job_manager.stats()['active'],
+        'total_logs': len(log_store),
+        'observers': result_subject.stats(),
+        'stream': event_hub.stats(),
+        'last_execution': history_store.latest(),
+        'resources': sample,
+        'series': resource_sampler.series(int(limit) if limit else None)
     })
 
 if __name__ == '__main__':
+    # 开发服务器；生产环境使用 gunicorn -c gunicorn.conf.py wsgi:application
     add_log('info', '系统启动')
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    resource_sampler.ensure_running()
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=5000)
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patterns.factory import AIModelFactory
+from patterns.strategy import AIContext
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results.json')
+
+TASKS = list(AIModelFactory.models)
+STRATEGIES = list(AIContext.strategies)
+
+def summarize(latencies, peak_bytes):
+    latencies = np.asarray(latencies) * 1000
+    total = latencies.sum() / 1000
+    return {
+        'iterations': int(len(latencies)),
+        'throughput_per_s': round(len(latencies) / total, 2) if total > 0 else None,
+        'mean_ms': round(float(latencies.mean()), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+        'peak_memory_bytes': int(peak_bytes)
+    }
+
+def measure(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    # 单独一轮测峰值内存，避免tracemalloc的开销影响计时
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(latencies, peak)
+
+def bench_models(iterations, warmup):
+    results = {}
+    factory = AIModelFactory()
+    for task_type in TASKS:
+        results[f'model/{task_type}/cold'] = measure(
+            lambda: factory.create_model(task_type, warm=False).execute(AIContext('baseline')),
+            max(1, iterations // 5), 1
+        )
+        for strategy_id in STRATEGIES:
+            results[f'model/{task_type}/{strategy_id}'] = measure(
+                lambda: factory.create_model(task_type).execute(AIContext(strategy_id)),
+                iterations, warmup
+            )
+    return results
+
+def bench_endpoints(iterations, warmup):
+    import app as backend
+
+    client = backend.app.test_client()
+    client.post('/api/run/batch', json={
+        'runs': [{'task': task_type, 'strategy': strategy_id} for task_type in TASKS for strategy_id in STRATEGIES]
+    })
+
+    def call(method, url, expected=200, **kwargs):
+        def request():
+            response = getattr(client, method)(url, **kwargs)
+            if response.status_code != expected:
+                raise RuntimeError(f'{method.upper()} {url} returned {response.status_code}')
+            response.get_data()
+        return request
+
+    cases = {
+        'endpoint/run': call('post', '/api/run', json={'task': 'classification', 'strategy': 'ensemble'}),
+        'endpoint/run_batch': call('post', '/api/run/batch', json={
+            'runs': [{'task': task_type, 'strategy': 'baseline'} for task_type in TASKS]
+        }),
+        'endpoint/compare': call('post', '/api/results/compare', json={'task': 'classification', 'strategies': STRATEGIES}),
+        'endpoint/history': call('get', '/api/history?page=1&page_size=10'),
+        'endpoint/stats': call('get', '/api/stats'),
+        'endpoint/logs': call('get', '/api/logs?limit=50'),
+        'endpoint/tasks': call('get', '/api/tasks'),
+        'endpoint/results': call('get', '/api/results')
+    }
+    return {name: measure(fn, iterations, warmup) for name, fn in cases.items()}
+
+def compare(results, baseline, tolerance, memory_tolerance, min_delta_ms):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            # 同时超过相对阈值和绝对阈值才算回归，避免亚毫秒级抖动误报
+            limit = max(previous[key] * (1 + tolerance), previous[key] + min_delta_ms)
+            if current[key] > limit:
+                regressions.append(f'{name} {key}: {current[key]:.4f} > {previous[key]:.4f} (+{tolerance:.0%})')
+        limit = previous['peak_memory_bytes'] * (1 + memory_tolerance)
+        if current['peak_memory_bytes'] > limit:
+            regressions.append(
+                f'{name} peak_memory_bytes: {current["peak_memory_bytes"]} > {previous["peak_memory_bytes"]} (+{memory_tolerance:.0%})'
+            )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every task x strategy and the main endpoints')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', choices=('models', 'endpoints'), default=None)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--require-baseline', action='store_true', help='exit with status 2 when the baseline is missing (CI)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed latency increase (fraction)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='ignore latency increases smaller than this')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help='allowed peak memory increase (fraction)')
+    args = parser.parse_args(argv)
+
+    # CI中缺少基准时直接失败，不跑完整套基准后才发现无法比较
+    if args.require_baseline and not args.update_baseline and not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}; run with --update-baseline on the CI machine and commit it')
+        return 2
+
+    results = {}
+    if args.only in (None, 'models'):
+        results.update(bench_models(args.iterations, args.warmup))
+    if args.only in (None, 'endpoints'):
+        results.update(bench_endpoints(args.iterations, args.warmup))
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'iterations': args.iterations,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    width = max(len(name) for name in results)
+    print(f'{"benchmark":<{width}}  {"p50 ms":>10}  {"p95 ms":>10}  {"p99 ms":>10}  {"ops/s":>10}  {"peak KB":>10}')
+    for name, item in sorted(results.items()):
+        print(
+            f'{name:<{width}}  {item["p50_ms"]:>10.3f}  {item["p95_ms"]:>10.3f}  {item["p99_ms"]:>10.3f}  '
+            f'{item["throughput_per_s"] or 0:>10.1f}  {item["peak_memory_bytes"] / 1024:>10.1f}'
+        )
+
+    if args.update_baseline:
+        # 基准与结果文件格式相同，附带机器信息，换了机器时比较前给出提示
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f'baseline written to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}; run with --update-baseline to create one')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    environment = ('python', 'numpy', 'machine')
+    changed = [key for key in environment if key in baseline and baseline[key] != report[key]]
+    if changed:
+        print('\nbaseline recorded on a different environment: ' + ', '.join(
+            f'{key} {baseline[key]} -> {report[key]}' for key in changed
+        ))
+    # 旧格式的基准只包含结果
+    regressions = compare(results, baseline.get('results', baseline), args.tolerance, args.memory_tolerance, args.min_delta_ms)
+    if regressions:
+        print('\nREGRESSIONS:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('\nno regressions against baseline')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
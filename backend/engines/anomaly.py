@@ -0,0 +1,98 @@
+import os
+from statistics import NormalDist
+import numpy as np
+
+try:
+    from sklearn.ensemble import IsolationForest
+except ImportError:
+    IsolationForest = None
+
+def chi2_quantile(q, df):
+    # Wilson-Hilferty近似，避免依赖scipy
+    z = NormalDist().inv_cdf(q)
+    a = 2 / (9 * df)
+    return df * (1 - a + z * np.sqrt(a)) ** 3
+
+def top_k(scores, k):
+    # argpartition只做部分排序，再对选出的k个排序，返回分数从高到低的行号
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    indices = np.argpartition(scores, len(scores) - k)[-k:]
+    return indices[np.argsort(scores[indices])[::-1]]
+
+class MahalanobisScorer:
+    method = 'mahalanobis'
+
+    def __init__(self, chunk_size=65536, ridge=1e-6, min_ridge=1e-12, quantile=0.975):
+        self.chunk_size = chunk_size
+        self.ridge = ridge
+        self.min_ridge = min_ridge
+        self.quantile = quantile
+        self.mean = None
+        self.precision = None
+        self.threshold = None
+
+    def fit(self, data):
+        # 分块累加一阶和二阶矩，协方差与精度矩阵只估计一次
+        count, dims = data.shape
+        total = np.zeros(dims)
+        outer = np.zeros((dims, dims))
+        for start in range(0, count, self.chunk_size):
+            chunk = np.asarray(data[start:start + self.chunk_size], dtype=np.float64)
+            total += chunk.sum(axis=0)
+            outer += chunk.T @ chunk
+        self.mean = total / count
+        covariance = (outer - count * np.outer(self.mean, self.mean)) / max(1, count - 1)
+        # 全部列为常数时协方差为零，绝对下限保证矩阵可逆
+        covariance += max(self.ridge * np.trace(covariance) / dims, self.min_ridge) * np.eye(dims)
+        self.precision = np.linalg.inv(covariance)
+        self.threshold = float(np.sqrt(chi2_quantile(self.quantile, dims)))
+        return self
+
+    def score(self, data):
+        scores = np.empty(len(data))
+        for start in range(0, len(data), self.chunk_size):
+            centered = np.asarray(data[start:start + self.chunk_size], dtype=np.float64) - self.mean
+            np.einsum('ij,jk,ik->i', centered, self.precision, centered, out=scores[start:start + len(centered)])
+        return np.sqrt(np.maximum(scores, 0, out=scores), out=scores)
+
+class IsolationForestScorer:
+    method = 'isolation_forest'
+
+    def __init__(self, chunk_size=65536, n_estimators=100, max_samples=256, seed=0):
+        self.chunk_size = chunk_size
+        self.n_estimators = n_estimators
+        self.max_samples = max_samples
+        self.seed = seed
+        self.forest = None
+        self.threshold = None
+
+    def fit(self, data):
+        # 森林只在一个子样本上训练，内存与数据总行数无关
+        rng = np.random.default_rng(self.seed)
+        size = min(len(data), max(self.max_samples * 16, 4096))
+        rows = np.sort(rng.choice(len(data), size, replace=False))
+        self.forest = IsolationForest(
+            n_estimators=self.n_estimators,
+            max_samples=min(self.max_samples, size),
+            random_state=self.seed
+        ).fit(np.asarray(data[rows]))
+        # score_samples取反后越大越异常，contamination='auto'时以0.5为界
+        self.threshold = float(-self.forest.offset_)
+        return self
+
+    def score(self, data):
+        scores = np.empty(len(data))
+        for start in range(0, len(data), self.chunk_size):
+            chunk = np.asarray(data[start:start + self.chunk_size])
+            scores[start:start + len(chunk)] = -self.forest.score_samples(chunk)
+        return scores
+
+def create_scorer(method=None, chunk_size=None):
+    method = method or os.environ.get('ANOMALY_METHOD', 'mahalanobis')
+    chunk_size = chunk_size or int(os.environ.get('ANOMALY_CHUNK_SIZE', 65536))
+    if method == 'isolation_forest' and IsolationForest is not None:
+        return IsolationForestScorer(chunk_size=chunk_size)
+    # 未安装scikit-learn时退回马氏距离
+    return MahalanobisScorer(chunk_size=chunk_size)
@@ -0,0 +1,45 @@
+import os
+import threading
+import numpy as np
+
+class ImageBatchStore:
+    def __init__(self, shape=(50, 224, 224, 3), dtype=np.uint8, path=None, seed=0):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.seed = seed
+        self._images = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        # 只构建一次，之后所有请求共享同一份只读数据
+        images = self._images
+        if images is None:
+            with self._lock:
+                if self._images is None:
+                    self._images = self._build()
+                images = self._images
+        return images
+
+    def _build(self):
+        if self.path and os.path.exists(self.path):
+            return np.load(self.path, mmap_mode='r')
+
+        rng = np.random.default_rng(self.seed)
+        if self.dtype == np.uint8:
+            images = rng.integers(0, 256, size=self.shape, dtype=np.uint8)
+        else:
+            images = rng.random(self.shape, dtype=np.float32) * 255
+            images = images.astype(self.dtype, copy=False)
+
+        if self.path:
+            np.save(self.path, images)
+            return np.load(self.path, mmap_mode='r')
+
+        images.flags.writeable = False
+        return images
+
+    def nbytes(self):
+        return self._images.nbytes if self._images is not None else 0
+
+image_store = ImageBatchStore(path=os.environ.get('IMAGE_STORE_PATH'))
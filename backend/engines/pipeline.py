@@ -0,0 +1,43 @@
+import queue
+import threading
+
+def iter_batches(data, batch_size):
+    for start in range(0, len(data), batch_size):
+        yield data[start:start + batch_size]
+
+def prefetch(iterable, depth=1):
+    # 后台线程提前生成后续depth个元素，与当前元素的消费并行
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except Exception as e:
+            put((False, e))
+
+    thread = threading.Thread(target=worker, name='batch-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, item = items.get()
+            if not ok:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        # 消费方提前退出时通知后台线程结束
+        stop.set()
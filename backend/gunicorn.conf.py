@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', 8))
+# WEB_WORKER_CLASS=gevent时SSE连接只占用协程，不受线程数限制(需要安装gevent)
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+# 在master中导入应用并预热模型，worker通过fork共享内存
+preload_app = True
+
+# 多个worker时必须共享状态，否则每个进程各有一份配置和历史
+if workers > 1:
+    os.environ.setdefault('SHARED_STATE', '1')
+
+# gthread下每个SSE连接在整个生命周期内占用一个线程，订阅数限制在线程数的一半，
+# 其余线程始终留给/api/run等普通请求；超出的订阅返回503，前端退回按需拉取
+if worker_class == 'gthread':
+    os.environ.setdefault('STREAM_MAX_CLIENTS', str(max(1, threads // 2)))
+
+def post_fork(server, worker):
+    from app import resource_sampler
+
+    resource_sampler.ensure_running()
@@ -1,9 +1,64 @@
 from abc import ABC, abstractmethod
 from patterns.strategy import AIContext
-import numpy as np
+from engines.anomaly import create_scorer, top_k
+from engines.forecasting import OnlineForecaster, forecaster
+from engines.images import image_store
+from engines.pipeline import iter_batches, prefetch
+from engines.recommendation import build_index
+from collections import OrderedDict
+import copy
+import os
+import threading
 import time
+import tracemalloc
+import numpy as np
+
+class InflightCounter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self._value += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self._value -= 1
+        return False
+
+    def value(self):
+        return self._value
+
+inflight_tasks = InflightCounter()
+
+# 阶段耗时记录器：recorder(task, strategy, stage, seconds, allocated_bytes)，为None时不做任何计时；
+# allocations为True时用tracemalloc测量阶段内分配的峰值字节数(含临时数组)，否则allocated_bytes为None
+stage_recorder = None
+trace_allocations = False
+
+def set_stage_recorder(recorder, allocations=False):
+    global stage_recorder, trace_allocations
+    stage_recorder = recorder
+    trace_allocations = allocations
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def allocation_start():
+    # tracemalloc是进程级的：并发执行的阶段会互相计入，峰值在每个阶段开始时重置
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    return current
+
+def allocated_since(start):
+    if start is None or not tracemalloc.is_tracing():
+        return None
+    return max(0, tracemalloc.get_traced_memory()[1] - start)
 
 class AIModel(ABC):
+    task_type = None
+
     @abstractmethod
     def load_data(self):
         pass
@@ -20,47 +75,162 @@ class AIModel(ABC):
     def output_result(self):
         pass
 
-    def execute(self, context):
-        self.load_data()
-        self.preprocess()
-        result = self.inference(context)
-        return self.output_result()
+    stages = ('load_data', 'preprocess', 'inference', 'output_result')
+    prepared = False
+    # 上传的数据集(内存映射)；为None时各模型生成模拟数据
+    dataset = None
+    dataset_ndim = 2
+    dataset_min_rows = 1
+    # 模型池未命中时由工厂设置，prepare完成后把预处理结果放入模型池
+    pool = None
+    pool_key = None
+
+    def execute(self, context, rng=None, on_stage=None):
+        # 每次执行使用独立的随机数生成器，线程安全且可复现
+        if rng is not None:
+            context.set_rng(rng)
+        with inflight_tasks:
+            if self.prepared:
+                # 来自模型池的预热实例，跳过数据加载和预处理
+                self._report_cached(on_stage)
+            else:
+                # 冷启动的构建同样计入阶段状态、耗时、取消检查和inflight统计
+                self.prepare(context.get_rng(), on_stage)
+            return self._infer(context, on_stage)
+
+    def prepare(self, rng=None, on_stage=None):
+        pool, self.pool = self.pool, None
+        if pool is None:
+            self._prepare(rng, on_stage)
+            return
+
+        def build():
+            # 池中的数据集使用固定种子生成，保证复现性与是否命中缓存无关
+            self._prepare(np.random.default_rng(pool.dataset_seed), on_stage)
+            return self.fork()
+
+        pooled, built = pool.build(self.pool_key, build)
+        if not built:
+            # 等待期间其他请求已完成构建，直接共享池中的数组
+            vars(self).update(vars(pooled.fork()))
+            self._report_cached(on_stage)
+
+    def _prepare(self, rng, on_stage):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._run_stages(('load_data', 'preprocess'), None, on_stage)
+        self.prepared = True
+
+    def _report_cached(self, on_stage):
+        if on_stage is not None:
+            on_stage('load_data', 'cached')
+            on_stage('preprocess', 'cached')
+
+    def nbytes(self):
+        # 内存映射数组由页缓存承载，不计入模型池内存
+        return sum(
+            value.nbytes for value in vars(self).values()
+            if isinstance(value, np.ndarray) and not isinstance(value, np.memmap)
+        )
+
+    def infer(self, context, on_stage=None):
+        with inflight_tasks:
+            return self._infer(context, on_stage)
+
+    def _infer(self, context, on_stage):
+        self.rng = context.get_rng()
+        return self._run_stages(('inference', 'output_result'), context, on_stage)
+
+    def stream_batches(self, data, batch_size, transform, dtype=np.float32, prefetch_batches=True):
+        # 按批生成transform(batch, out)写入的结果，out来自预分配并循环复用的缓冲区；
+        # 预取时下一批在后台线程中准备，三个缓冲区保证正在使用的批次不会被覆盖
+        buffers = [
+            np.empty((min(batch_size, len(data)),) + data.shape[1:], dtype=dtype)
+            for _ in range(3 if prefetch_batches else 1)
+        ]
+
+        def produce():
+            for index, batch in enumerate(iter_batches(data, batch_size)):
+                out = buffers[index % len(buffers)][:len(batch)]
+                transform(batch, out)
+                yield out
+
+        return prefetch(produce()) if prefetch_batches else produce()
+
+    def fork(self):
+        # 浅拷贝共享已加载和预处理的数组，各自持有独立的推理结果
+        forked = copy.copy(self)
+        forked.result = None
+        return forked
+
+    def _run_stages(self, stages, context, on_stage):
+        steps = {
+            'load_data': self.load_data,
+            'preprocess': self.preprocess,
+            'inference': lambda: self.inference(context),
+            'output_result': self.output_result
+        }
+        recorder = stage_recorder
+        strategy = context.get_strategy_type() if context is not None else 'none'
+        result = None
+        for stage in stages:
+            if on_stage is not None:
+                on_stage(stage, 'running')
+            if recorder is None:
+                result = steps[stage]()
+            else:
+                allocated_from = allocation_start() if trace_allocations and tracemalloc.is_tracing() else None
+                start = time.perf_counter()
+                result = steps[stage]()
+                elapsed = time.perf_counter() - start
+                recorder(self.task_type, strategy, stage, elapsed, allocated_since(allocated_from))
+            if on_stage is not None:
+                on_stage(stage, 'completed')
+        return result
 
 class PredictionModel(AIModel):
+    task_type = 'prediction'
+    horizon = 10
+
     def __init__(self):
-        self.data = None
-        self.processed_data = None
+        self.forecaster = forecaster
         self.result = None
 
     def load_data(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        self.data = np.random.randn(100, 5) * 10 + 50
+        if self.dataset is not None:
+            # 上传的数据集使用独立的在线序列，按块追加，不复制整份数据
+            self.forecaster = OnlineForecaster(dims=self.dataset.shape[1], window=forecaster.window_size)
+            for batch in iter_batches(self.dataset, 65536):
+                self.forecaster.append(batch)
+            return True
+        # 首次运行时用模拟历史初始化在线序列，之后的观测通过 /api/prediction/points 追加
+        self.forecaster.seed(self.rng.standard_normal((100, 5)) * 10 + 50)
         return True
 
     def preprocess(self):
-        self.processed_data = (self.data - self.data.mean(axis=0)) / (self.data.std(axis=0) + 1e-8)
+        # 均值和方差由追加数据时的在线统计维护，不再每次重新计算
         return True
 
     def inference(self, context):
-        predictions = context.execute_prediction(self.processed_data)
+        snapshot = self.forecaster.snapshot()
+        window, count, mean, std = snapshot
+        predictions = context.execute_prediction((window - mean) / np.where(std > 0, std, 1.0))
         metrics = context.get_metrics()
 
-        # 生成基于时间的真实预测数据
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        time_points = 10
-        trend = np.linspace(0, 1, time_points)
-        noise = np.random.randn(time_points) * 0.1
-        base_value = predictions['confidence']
-        values = base_value + trend * 0.2 + noise
+        # 基于滚动窗口的趋势外推
+        forecast = self.forecaster.forecast(self.horizon, snapshot)
 
         self.result = {
             'type': 'prediction',
             'predictions': predictions,
             'metrics': metrics,
-            'data_shape': list(self.data.shape),
+            'data_shape': [count, self.forecaster.dims],
+            'window_size': len(window),
+            'running_mean': mean,
+            'running_std': std,
+            'forecast': forecast,
             'chart_data': {
-                'labels': [f'T{i+1}' for i in range(time_points)],
-                'values': [max(0, min(1, v)) for v in values.tolist()]
+                'labels': [f'T{i+1}' for i in range(self.horizon)],
+                'values': forecast.mean(axis=1)
             }
         }
         return self.result
@@ -69,40 +239,65 @@ class PredictionModel(AIModel):
         return self.result
 
 class ClassificationModel(AIModel):
+    task_type = 'classification'
+    dataset_ndim = 4
+    batch_size = int(os.environ.get('CLASSIFICATION_BATCH_SIZE', 8))
+    prefetch_batches = os.environ.get('CLASSIFICATION_PREFETCH', '1') == '1'
+    classes = ['Cat', 'Dog', 'Bird', 'Fish', 'Horse']
+
     def __init__(self):
         self.data = None
-        self.processed_data = None
+        self.features = None
+        self.head = None
         self.result = None
 
     def load_data(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        self.data = np.random.rand(50, 224, 224, 3)
+        # 共享只读的uint8图像批次，不再每次请求重新生成
+        self.data = self.dataset if self.dataset is not None else image_store.get()
         return True
 
     def preprocess(self):
-        self.processed_data = self.data / 255.0
+        # 图像按批流式归一化到复用缓冲区(后台预取下一批)，只保留每张图像的通道均值特征；
+        # 整数像素按0-255缩放，浮点数据集视为已归一化，只转换为float32
+        features = np.empty((len(self.data), self.data.shape[-1]), dtype=np.float32)
+        scale = np.float32(1 / 255.0) if np.issubdtype(self.data.dtype, np.integer) else np.float32(1)
+
+        def normalize(batch, out):
+            np.multiply(batch, scale, out=out, casting='unsafe')
+
+        start = 0
+        for batch in self.stream_batches(self.data, self.batch_size, normalize, prefetch_batches=self.prefetch_batches):
+            batch.mean(axis=(1, 2), out=features[start:start + len(batch)])
+            start += len(batch)
+        self.features = features
+        self.head = self.rng.standard_normal((features.shape[1], len(self.classes)))
         return True
 
     def inference(self, context):
-        predictions = context.execute_prediction(self.processed_data)
+        # 逐批计算每张图像的类别概率并累加，得到整体的类别分布
+        probability_sum = np.zeros(len(self.classes))
+        bias = self.rng.standard_normal(len(self.classes))
+        for batch in iter_batches(self.features, self.batch_size):
+            logits = batch @ self.head + bias
+            logits -= logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            probability_sum += probabilities.sum(axis=0)
+        count = len(self.features)
+        class_probs = probability_sum / max(1, count)
+
+        predictions = context.execute_prediction(class_probs)
         metrics = context.get_metrics()
 
-        classes = ['Cat', 'Dog', 'Bird', 'Fish', 'Horse']
-
-        # 生成真实的分类概率分布
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        logits = np.random.randn(len(classes))
-        exp_logits = np.exp(logits - np.max(logits))
-        class_probs = (exp_logits / exp_logits.sum()).tolist()
-
         self.result = {
             'type': 'classification',
             'predictions': predictions,
             'metrics': metrics,
-            'classes': classes,
+            'classes': self.classes,
             'class_probabilities': class_probs,
+            'image_count': count,
             'chart_data': {
-                'labels': classes,
+                'labels': self.classes,
                 'values': class_probs
             }
         }
@@ -112,40 +307,56 @@ class ClassificationModel(AIModel):
         return self.result
 
 class RecommendationModel(AIModel):
+    task_type = 'recommendation'
+    item_count = int(os.environ.get('RECOMMENDATION_ITEMS', 1000))
+    user_count = 4
+    top_k = 10
+
     def __init__(self):
         self.data = None
-        self.processed_data = None
+        self.index = None
         self.result = None
 
     def load_data(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        self.data = np.random.rand(1000, 20)
+        # 物品向量
+        if self.dataset is not None:
+            self.data = self.dataset
+            return True
+        self.data = self.rng.standard_normal((self.item_count, 20)).astype(np.float32)
         return True
 
     def preprocess(self):
-        self.processed_data = (self.data - self.data.min()) / (self.data.max() - self.data.min() + 1e-8)
+        # 只归一化一次，保存为连续的float32索引(物品很多时为IVF索引)
+        self.index = build_index(self.data)
         return True
 
+    def nbytes(self):
+        return super().nbytes() + (self.index.nbytes() if self.index is not None else 0)
+
     def inference(self, context):
-        predictions = context.execute_prediction(self.processed_data)
+        predictions = context.execute_prediction(self.data)
         metrics = context.get_metrics()
 
-        items = [f'Item {i+1}' for i in range(10)]
-
-        # 生成真实的推荐分数(基于用户相似度)
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        base_scores = np.random.beta(5, 2, 10)  # 偏向高分
-        scores = sorted(base_scores.tolist(), reverse=True)
+        # 一批用户向量一次查询，第一个用户的结果用于图表
+        users = self.rng.standard_normal((self.user_count, self.data.shape[1]))
+        indices, scores = self.index.search(users, self.top_k)
+        items = [f'Item {i+1}' for i in indices[0].tolist()]
 
         self.result = {
             'type': 'recommendation',
             'predictions': predictions,
             'metrics': metrics,
+            'index': self.index.kind,
+            'catalog_size': len(self.index),
             'recommended_items': items,
-            'scores': scores,
+            'scores': scores[0],
+            'batch': [
+                {'user': user, 'items': indices[user], 'scores': scores[user]}
+                for user in range(len(users))
+            ],
             'chart_data': {
                 'labels': items,
-                'values': scores
+                'values': scores[0]
             }
         }
         return self.result
@@ -154,43 +365,56 @@ class RecommendationModel(AIModel):
         return self.result
 
 class AnomalyDetectionModel(AIModel):
+    task_type = 'anomaly'
+    top_k = 20
+    # 协方差至少需要两行
+    dataset_min_rows = 2
+
     def __init__(self):
         self.data = None
-        self.processed_data = None
+        self.scores = None
+        self.scorer = None
         self.result = None
 
     def load_data(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
+        if self.dataset is not None:
+            # 打分按块读取内存映射，不把整份数据载入内存
+            self.data = self.dataset
+            return True
         # 正常数据
-        normal_data = np.random.randn(180, 10)
+        normal_data = self.rng.standard_normal((180, 10))
         # 异常数据
-        anomaly_data = np.random.randn(20, 10) * 3 + 5
+        anomaly_data = self.rng.standard_normal((20, 10)) * 3 + 5
         self.data = np.vstack([normal_data, anomaly_data])
-        np.random.shuffle(self.data)
+        self.rng.shuffle(self.data)
         return True
 
     def preprocess(self):
-        self.processed_data = (self.data - self.data.mean(axis=0)) / (self.data.std(axis=0) + 1e-8)
+        # 估计一次协方差(或训练孤立森林)，按块为每一行打分，不再复制标准化后的整份数据
+        self.scorer = create_scorer().fit(self.data)
+        self.scores = self.scorer.score(self.data)
         return True
 
     def inference(self, context):
-        predictions = context.execute_prediction(self.processed_data)
+        predictions = context.execute_prediction(self.data)
         metrics = context.get_metrics()
 
-        # 计算真实的异常分数(基于马氏距离)
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        sample_indices = np.random.choice(len(self.processed_data), 20, replace=False)
-        distances = np.sqrt((self.processed_data[sample_indices] ** 2).sum(axis=1))
-        anomaly_scores = (distances / distances.max()).tolist()
-
-        timestamps = [f'T{i+1}' for i in range(20)]
-        anomaly_count = sum(1 for s in anomaly_scores if s > 0.6)
+        top = top_k(self.scores, self.top_k)
+        top_scores = self.scores[top]
+        anomaly_scores = top_scores / top_scores[0] if len(top) and top_scores[0] > 0 else top_scores
+        timestamps = [f'T{i+1}' for i in top.tolist()]
+        anomaly_count = int((self.scores > self.scorer.threshold).sum())
 
         self.result = {
             'type': 'anomaly_detection',
             'predictions': predictions,
             'metrics': metrics,
+            'method': self.scorer.method,
+            'total_rows': len(self.scores),
+            'threshold': self.scorer.threshold,
+            'anomaly_indices': top,
             'anomaly_scores': anomaly_scores,
+            'raw_scores': top_scores,
             'timestamps': timestamps,
             'anomaly_count': anomaly_count,
             'chart_data': {
@@ -203,13 +427,160 @@ class AnomalyDetectionModel(AIModel):
     def output_result(self):
         return self.result
 
+class ModelPool:
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=600, dataset_seed=0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.dataset_seed = dataset_seed
+        self._entries = OrderedDict()
+        self._build_locks = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['model']
+
+    def build(self, key, build):
+        # 同一个key只构建一次，避免并发请求重复加载数据；返回 (模型, 是否由本次调用构建)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry['expires_at'] > time.monotonic():
+                    return entry['model'], False
+            model = build()
+            self.put(key, model)
+        return model, True
+
+    def put(self, key, model):
+        nbytes = model.nbytes()
+        for value in vars(model).values():
+            if isinstance(value, np.ndarray) and value.flags.writeable:
+                value.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                return False
+            self._entries[key] = {
+                'model': model,
+                'nbytes': nbytes,
+                'expires_at': time.monotonic() + self.ttl
+            }
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._build_locks.clear()
+            self._bytes = 0
+
+    def discard_dataset(self, dataset_id):
+        # 数据集删除后移除所有基于它构建的模型
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == dataset_id]:
+                self._remove(key)
+            # 构建锁随数据集一起释放，避免按数据集ID无限增长
+            for key in [key for key in self._build_locks if key[1] == dataset_id]:
+                del self._build_locks[key]
+
+    def nbytes(self):
+        return self._bytes
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'entries': [
+                    {
+                        'task': key[0],
+                        'dataset_id': key[1],
+                        'bytes': entry['nbytes'],
+                        'ttl_remaining': round(max(0.0, entry['expires_at'] - time.monotonic()), 3)
+                    }
+                    for key, entry in self._entries.items()
+                ],
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / requests, 4) if requests else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['nbytes']
+
+model_pool = ModelPool(
+    max_bytes=int(os.environ.get('MODEL_POOL_BYTES', 256 * 1024 * 1024)),
+    ttl=float(os.environ.get('MODEL_POOL_TTL', 600))
+)
+
 class AIModelFactory:
-    def create_model(self, task_type):
-        models = {
-            'prediction': PredictionModel,
-            'classification': ClassificationModel,
-            'recommendation': RecommendationModel,
-            'anomaly': AnomalyDetectionModel
-        }
-        model_class = models.get(task_type, PredictionModel)
-        return model_class()
+    models = {
+        'prediction': PredictionModel,
+        'classification': ClassificationModel,
+        'recommendation': RecommendationModel,
+        'anomaly': AnomalyDetectionModel
+    }
+
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else model_pool
+
+    @staticmethod
+    def stages():
+        return AIModel.stages
+
+    def create_model(self, task_type, warm=True, dataset=None):
+        # dataset: 提供id和load()的数据集对象，模型直接读取其内存映射数组
+        if task_type not in self.models:
+            task_type = 'prediction'
+        model_class = self.models[task_type]
+        if dataset is not None and len(dataset.shape) != model_class.dataset_ndim:
+            raise ValueError(f'{task_type}任务需要{model_class.dataset_ndim}维数据集，实际为{len(dataset.shape)}维')
+        if dataset is not None and dataset.shape[0] < model_class.dataset_min_rows:
+            raise ValueError(f'{task_type}任务至少需要{model_class.dataset_min_rows}行数据，实际为{dataset.shape[0]}行')
+
+        def new_model():
+            model = model_class()
+            if dataset is not None:
+                model.dataset = dataset.load()
+            return model
+
+        if not warm:
+            return new_model()
+
+        key = (task_type, dataset.id if dataset is not None else None)
+        pooled = self.pool.get(key)
+        if pooled is not None:
+            return pooled.fork()
+        # 未命中时返回未预处理的实例，由execute(或调用方的prepare)构建后放入模型池
+        model = new_model()
+        model.pool = self.pool
+        model.pool_key = key
+        return model
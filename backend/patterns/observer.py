@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict, deque
+import os
+import threading
+import time
 
 class Observer(ABC):
     @abstractmethod
@@ -19,26 +24,155 @@ class Subject(ABC):
         pass
 
 class ResultObserver(Observer):
-    def __init__(self):
+    def __init__(self, store=None):
         self._latest_result = None
         self._result_history = []
+        # 可选的共享存储，多worker部署时所有进程看到同一个最新结果
+        self._store = store
 
     def update(self, result):
-        self._latest_result = result
-        self._result_history.append(result)
-        if len(self._result_history) > 10:
-            self._result_history.pop(0)
+        self.update_many([result])
+
+    def update_many(self, results):
+        # 批量结果只把最后一个写入共享存储
+        if not results:
+            return
+        self._latest_result = results[-1]
+        if self._store is not None:
+            self._store.set('latest_result', results[-1])
+        self._result_history.extend(results)
+        del self._result_history[:-10]
 
     def get_latest_result(self):
+        if self._store is not None:
+            return self._store.get('latest_result')
         return self._latest_result
 
     def get_history(self):
         return self._result_history
 
-class ResultSubject(Subject):
+class StatsAggregator(Observer):
+    # 延迟直方图的桶边界(毫秒)，按1.25倍等比增长，覆盖0.01ms到约2分钟
+    LATENCY_BOUNDS = [0.01 * 1.25 ** i for i in range(74)]
+    # 删除先于添加到达的ID(如同一批次内即被淘汰)只保留最近的若干个
+    MAX_EARLY_REMOVALS = 1024
+
     def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = set()
+        self._removed_early = OrderedDict()
+        self._count = 0
+        self._completed = 0
+        self._accuracy_sum = 0.0
+        self._task_distribution = {}
+        self._strategy_distribution = {}
+        self._latency_buckets = [0] * (len(self.LATENCY_BOUNDS) + 1)
+        self._latency_count = 0
+
+    def update(self, result):
+        execution = result.get('execution') if isinstance(result, dict) else None
+        if execution is not None:
+            self.add(execution)
+
+    def add(self, entry):
+        with self._lock:
+            entry_id = entry['id']
+            if entry_id in self._ids:
+                return
+            if self._removed_early.pop(entry_id, None):
+                # 删除先于添加到达，直接忽略
+                return
+            self._ids.add(entry_id)
+            self._apply(entry, 1)
+
+    def remove(self, entry, reason=None):
+        with self._lock:
+            entry_id = entry['id']
+            if entry_id not in self._ids:
+                self._removed_early[entry_id] = True
+                if len(self._removed_early) > self.MAX_EARLY_REMOVALS:
+                    self._removed_early.popitem(last=False)
+                return
+            self._ids.discard(entry_id)
+            self._apply(entry, -1)
+
+    def _apply(self, entry, sign):
+        self._count += sign
+        if entry.get('status') == 'completed':
+            self._completed += sign
+        self._accuracy_sum += sign * entry['accuracy']
+        for key, distribution in (('task', self._task_distribution), ('strategy', self._strategy_distribution)):
+            value = entry[key]
+            distribution[value] = distribution.get(value, 0) + sign
+            if distribution[value] == 0:
+                del distribution[value]
+        latency = entry.get('latency_ms')
+        if latency is not None:
+            self._latency_buckets[self.latency_bucket(latency)] += sign
+            self._latency_count += sign
+
+    @classmethod
+    def latency_bucket(cls, latency):
+        return bisect_left(cls.LATENCY_BOUNDS, latency)
+
+    @classmethod
+    def percentiles(cls, buckets, total):
+        # 由直方图估计p50/p95/p99，取所在桶的上界；SQLite后端用数据库中的计数复用同一算法
+        return {name: cls._percentile(buckets, total, q) for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))}
+
+    @classmethod
+    def _percentile(cls, buckets, total, q):
+        if total <= 0:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(buckets):
+            seen += count
+            if seen >= rank and count > 0:
+                if index >= len(cls.LATENCY_BOUNDS):
+                    return round(cls.LATENCY_BOUNDS[-1], 3)
+                return round(cls.LATENCY_BOUNDS[index], 3)
+        return round(cls.LATENCY_BOUNDS[-1], 3)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'count': self._count,
+                'completed': self._completed,
+                'avg_accuracy': self._accuracy_sum / self._count if self._count else 0,
+                'task_distribution': dict(self._task_distribution),
+                'strategy_distribution': dict(self._strategy_distribution),
+                'latency_ms': self.percentiles(self._latency_buckets, self._latency_count)
+            }
+
+class ResultSubject(Subject):
+    MODES = ('sync', 'async')
+    OVERFLOW_POLICIES = ('drop_oldest', 'block', 'coalesce')
+
+    def __init__(self, mode='sync', queue_size=1024, workers=1, overflow='drop_oldest', on_error=None):
+        if mode not in self.MODES:
+            raise ValueError(f'不支持的分发模式: {mode}')
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'不支持的溢出策略: {overflow}')
         self._observers = []
         self._result = None
+        self.mode = mode
+        self.queue_size = max(1, queue_size)
+        self.workers = max(1, workers)
+        self.overflow = overflow
+        # on_error(observer, exc)：某个观察者出错时回调，不影响其他观察者
+        self.on_error = on_error
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._busy = 0
+        self._enqueued = 0
+        self._dispatched = 0
+        self._dropped = 0
+        self._errors = {}
+        self._last_lag = None
+        self._max_lag = 0.0
 
     def attach(self, observer):
         if observer not in self._observers:
@@ -49,9 +183,106 @@ class ResultSubject(Subject):
             self._observers.remove(observer)
 
     def notify(self):
-        for observer in self._observers:
-            observer.update(self._result)
+        if self.mode == 'async':
+            self._enqueue(self._result)
+        else:
+            self._dispatch(self._result)
 
     def set_result(self, result):
         self._result = result
         self.notify()
+
+    def _dispatch(self, result):
+        for observer in list(self._observers):
+            try:
+                observer.update(result)
+            except Exception as e:
+                name = type(observer).__name__
+                with self._cond:
+                    self._errors[name] = self._errors.get(name, 0) + 1
+                if self.on_error is not None:
+                    self.on_error(observer, e)
+
+    def _enqueue(self, result):
+        self._ensure_dispatchers()
+        item = (time.monotonic(), result)
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                if self.overflow == 'block':
+                    while len(self._queue) >= self.queue_size:
+                        self._cond.wait()
+                elif self.overflow == 'coalesce':
+                    # 只保留最新的结果，积压的旧结果全部丢弃
+                    self._dropped += len(self._queue)
+                    self._queue.clear()
+                else:
+                    self._queue.popleft()
+                    self._dropped += 1
+            self._queue.append(item)
+            self._enqueued += 1
+            self._cond.notify_all()
+
+    def _ensure_dispatchers(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            # fork之后的子进程需要重新启动分发线程
+            self._pid = os.getpid()
+            self._busy = 0
+            self._threads = [
+                threading.Thread(target=self._loop, name=f'observer-dispatch-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _loop(self):
+        pid = os.getpid()
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                    if self._pid != pid:
+                        return
+                enqueued_at, result = self._queue.popleft()
+                self._busy += 1
+                self._cond.notify_all()
+            lag = time.monotonic() - enqueued_at
+            self._dispatch(result)
+            with self._cond:
+                self._busy -= 1
+                self._dispatched += 1
+                self._last_lag = lag
+                self._max_lag = max(self._max_lag, lag)
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        # 等待队列中的结果全部分发完成，同步模式下直接返回
+        if self.mode != 'async' or self._pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {
+                'mode': self.mode,
+                'overflow': self.overflow,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'queued': len(self._queue),
+                'enqueued': self._enqueued,
+                'dispatched': self._dispatched,
+                'dropped': self._dropped,
+                'errors': dict(self._errors),
+                'last_lag_ms': round(self._last_lag * 1000, 3) if self._last_lag is not None else None,
+                'max_lag_ms': round(self._max_lag * 1000, 3)
+            }
@@ -1,12 +1,23 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+# 不可变的配置快照，每次修改生成新对象并递增版本号
+ConfigSnapshot = namedtuple('ConfigSnapshot', ['version', 'current_task', 'current_strategy'])
+
 class SystemConfig:
     _instance = None
+    _instance_lock = threading.Lock()
+    FIELDS = ('current_task', 'current_strategy')
+    MAX_SESSIONS = 1000
 
     def __init__(self):
         if SystemConfig._instance is not None:
             raise Exception("This is a singleton class!")
         else:
-            self._current_task = None
-            self._current_strategy = None
+            self._snapshot = ConfigSnapshot(0, None, None)
+            self._write_lock = threading.Lock()
+            self._sessions = OrderedDict()
+            self._store = None
             self._system_state = {
                 'initialized': True,
                 'running': False
@@ -15,22 +26,80 @@ class SystemConfig:
     @staticmethod
     def get_instance():
         if SystemConfig._instance is None:
-            SystemConfig._instance = SystemConfig()
+            with SystemConfig._instance_lock:
+                if SystemConfig._instance is None:
+                    SystemConfig._instance = SystemConfig()
         return SystemConfig._instance
 
+    def attach_store(self, store):
+        # 多worker部署时配置快照保存在共享存储中，所有进程读写同一份
+        self._store = store
+        store.compare_and_set('config', None, self._snapshot._asdict())
+
+    def snapshot(self, session_id=None):
+        # 读取不加锁：快照对象不可变，替换引用是原子操作
+        snapshot = self._load()
+        overrides = self._sessions.get(session_id) if session_id else None
+        if overrides:
+            snapshot = snapshot._replace(**overrides)
+        return snapshot
+
+    def compare_and_set(self, expected, **changes):
+        # expected不是当前快照时返回None，由调用方重新读取后重试
+        changes = {key: value for key, value in changes.items() if key in self.FIELDS}
+        updated = expected._replace(version=expected.version + 1, **changes)
+        if self._store is not None:
+            if not self._store.compare_and_set('config', expected._asdict(), updated._asdict()):
+                return None
+            return updated
+        with self._write_lock:
+            if self._snapshot is not expected:
+                return None
+            self._snapshot = updated
+        return updated
+
+    def update(self, session_id=None, **changes):
+        # 带session_id时只修改该会话的覆盖配置，不影响其他客户端
+        if session_id:
+            with self._write_lock:
+                # 先构造新字典再整体替换，并发读取的snapshot()始终能看到该会话的覆盖配置
+                overrides = dict(self._sessions.get(session_id, {}))
+                overrides.update((key, value) for key, value in changes.items() if key in self.FIELDS)
+                self._sessions[session_id] = overrides
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            return self.snapshot(session_id)
+        while True:
+            updated = self.compare_and_set(self._load(), **changes)
+            if updated is not None:
+                return updated
+
+    def clear_session(self, session_id):
+        with self._write_lock:
+            self._sessions.pop(session_id, None)
+
+    def _load(self):
+        if self._store is not None:
+            value = self._store.get('config')
+            if value is not None:
+                return ConfigSnapshot(**value)
+        return self._snapshot
+
+    def get_version(self):
+        return self._load().version
+
     def get_current_task(self):
-        return self._current_task
+        return self.snapshot().current_task
 
     def set_current_task(self, task):
-        self._current_task = task
-        return self._current_task
+        return self.update(current_task=task).current_task
 
     def get_current_strategy(self):
-        return self._current_strategy
+        return self.snapshot().current_strategy
 
     def set_current_strategy(self, strategy):
-        self._current_strategy = strategy
-        return self._current_strategy
+        return self.update(current_strategy=strategy).current_strategy
 
     def get_state(self):
         return self._system_state
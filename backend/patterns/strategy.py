@@ -1,14 +1,13 @@
 from abc import ABC, abstractmethod
 import numpy as np
-import time
 
 class AIStrategy(ABC):
     @abstractmethod
-    def predict(self, data):
+    def predict(self, data, rng):
         pass
 
     @abstractmethod
-    def get_performance_metrics(self):
+    def get_performance_metrics(self, rng):
         pass
 
 class BaselineStrategy(AIStrategy):
@@ -16,30 +15,28 @@ class BaselineStrategy(AIStrategy):
         self.name = "基础模型"
         self.base_accuracy = 0.75
 
-    def predict(self, data):
+    def predict(self, data, rng):
         # 添加随机性但保持在合理范围
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.03, 0.03)
+        variation = rng.uniform(-0.03, 0.03)
         confidence = max(0.7, min(0.8, self.base_accuracy + variation))
 
-        prediction_values = np.random.rand(10) * 0.5 + 0.5
+        prediction_values = rng.random(10) * 0.5 + 0.5
 
         return {
-            'predictions': prediction_values.tolist(),
+            'predictions': prediction_values,
             'confidence': confidence,
             'model': 'baseline'
         }
 
-    def get_performance_metrics(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.02, 0.02)
+    def get_performance_metrics(self, rng):
+        variation = rng.uniform(-0.02, 0.02)
 
         return {
             'accuracy': max(0.72, min(0.78, self.base_accuracy + variation)),
             'precision': max(0.70, min(0.76, 0.73 + variation)),
             'recall': max(0.69, min(0.75, 0.72 + variation)),
             'f1_score': max(0.71, min(0.77, 0.74 + variation)),
-            'training_time': np.random.uniform(2.0, 3.0)
+            'training_time': rng.uniform(2.0, 3.0)
         }
 
 class DeepLearningStrategy(AIStrategy):
@@ -47,29 +44,27 @@ class DeepLearningStrategy(AIStrategy):
         self.name = "深度学习模型"
         self.base_accuracy = 0.88
 
-    def predict(self, data):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.02, 0.02)
+    def predict(self, data, rng):
+        variation = rng.uniform(-0.02, 0.02)
         confidence = max(0.85, min(0.91, self.base_accuracy + variation))
 
-        prediction_values = np.random.rand(10) * 0.3 + 0.7
+        prediction_values = rng.random(10) * 0.3 + 0.7
 
         return {
-            'predictions': prediction_values.tolist(),
+            'predictions': prediction_values,
             'confidence': confidence,
             'model': 'deep_learning'
         }
 
-    def get_performance_metrics(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.015, 0.015)
+    def get_performance_metrics(self, rng):
+        variation = rng.uniform(-0.015, 0.015)
 
         return {
             'accuracy': max(0.86, min(0.90, self.base_accuracy + variation)),
             'precision': max(0.84, min(0.88, 0.86 + variation)),
             'recall': max(0.83, min(0.87, 0.85 + variation)),
             'f1_score': max(0.85, min(0.89, 0.87 + variation)),
-            'training_time': np.random.uniform(14.0, 17.0)
+            'training_time': rng.uniform(14.0, 17.0)
         }
 
 class AttentionStrategy(AIStrategy):
@@ -77,31 +72,29 @@ class AttentionStrategy(AIStrategy):
         self.name = "Attention增强模型"
         self.base_accuracy = 0.92
 
-    def predict(self, data):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.015, 0.015)
+    def predict(self, data, rng):
+        variation = rng.uniform(-0.015, 0.015)
         confidence = max(0.90, min(0.94, self.base_accuracy + variation))
 
-        prediction_values = np.random.rand(10) * 0.2 + 0.8
-        attention_weights = np.random.dirichlet(np.ones(10))
+        prediction_values = rng.random(10) * 0.2 + 0.8
+        attention_weights = rng.dirichlet(np.ones(10))
 
         return {
-            'predictions': prediction_values.tolist(),
+            'predictions': prediction_values,
             'confidence': confidence,
             'model': 'attention',
-            'attention_weights': attention_weights.tolist()
+            'attention_weights': attention_weights
         }
 
-    def get_performance_metrics(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.01, 0.01)
+    def get_performance_metrics(self, rng):
+        variation = rng.uniform(-0.01, 0.01)
 
         return {
             'accuracy': max(0.90, min(0.94, self.base_accuracy + variation)),
             'precision': max(0.89, min(0.93, 0.91 + variation)),
             'recall': max(0.88, min(0.92, 0.90 + variation)),
             'f1_score': max(0.89, min(0.93, 0.91 + variation)),
-            'training_time': np.random.uniform(21.0, 25.0)
+            'training_time': rng.uniform(21.0, 25.0)
         }
 
 class EnsembleStrategy(AIStrategy):
@@ -109,52 +102,63 @@ class EnsembleStrategy(AIStrategy):
         self.name = "集成学习模型"
         self.base_accuracy = 0.95
 
-    def predict(self, data):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.01, 0.01)
+    def predict(self, data, rng):
+        variation = rng.uniform(-0.01, 0.01)
         confidence = max(0.93, min(0.97, self.base_accuracy + variation))
 
-        prediction_values = np.random.rand(10) * 0.15 + 0.85
-        ensemble_weights = np.random.dirichlet(np.ones(3))
+        prediction_values = rng.random(10) * 0.15 + 0.85
+        ensemble_weights = rng.dirichlet(np.ones(3))
 
         return {
-            'predictions': prediction_values.tolist(),
+            'predictions': prediction_values,
             'confidence': confidence,
             'model': 'ensemble',
-            'ensemble_weights': ensemble_weights.tolist()
+            'ensemble_weights': ensemble_weights
         }
 
-    def get_performance_metrics(self):
-        np.random.seed(int(time.time() * 1000) % 2**32)
-        variation = np.random.uniform(-0.008, 0.008)
+    def get_performance_metrics(self, rng):
+        variation = rng.uniform(-0.008, 0.008)
 
         return {
             'accuracy': max(0.93, min(0.97, self.base_accuracy + variation)),
             'precision': max(0.92, min(0.96, 0.94 + variation)),
             'recall': max(0.91, min(0.95, 0.93 + variation)),
             'f1_score': max(0.92, min(0.96, 0.94 + variation)),
-            'training_time': np.random.uniform(42.0, 48.0)
+            'training_time': rng.uniform(42.0, 48.0)
         }
 
 class AIContext:
-    def __init__(self, strategy_type='baseline'):
+    strategies = {
+        'baseline': BaselineStrategy,
+        'deep_learning': DeepLearningStrategy,
+        'attention': AttentionStrategy,
+        'ensemble': EnsembleStrategy
+    }
+
+    def __init__(self, strategy_type='baseline', seed=None):
         self._strategy = self._create_strategy(strategy_type)
+        self._rng = np.random.default_rng(seed)
 
     def _create_strategy(self, strategy_type):
-        strategies = {
-            'baseline': BaselineStrategy,
-            'deep_learning': DeepLearningStrategy,
-            'attention': AttentionStrategy,
-            'ensemble': EnsembleStrategy
-        }
-        strategy_class = strategies.get(strategy_type, BaselineStrategy)
-        return strategy_class()
+        if strategy_type not in self.strategies:
+            strategy_type = 'baseline'
+        self._strategy_type = strategy_type
+        return self.strategies[strategy_type]()
 
     def set_strategy(self, strategy_type):
         self._strategy = self._create_strategy(strategy_type)
 
+    def get_strategy_type(self):
+        return self._strategy_type
+
+    def get_rng(self):
+        return self._rng
+
+    def set_rng(self, rng):
+        self._rng = rng
+
     def execute_prediction(self, data=None):
-        return self._strategy.predict(data)
+        return self._strategy.predict(data, self._rng)
 
     def get_metrics(self):
-        return self._strategy.get_performance_metrics()
+        return self._strategy.get_performance_metrics(self._rng)
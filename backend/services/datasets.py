@@ -0,0 +1,182 @@
+import os
+import threading
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+class DatasetError(ValueError):
+    pass
+
+class DatasetNotFound(LookupError):
+    pass
+
+class Dataset:
+    def __init__(self, dataset_id, path, shape, dtype):
+        self.id = dataset_id
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    def load(self):
+        # 零拷贝内存映射，多个请求和worker通过操作系统页缓存共享同一份数据
+        return np.load(self.path, mmap_mode='r')
+
+class DatasetStore:
+    FORMATS = ('csv', 'npy')
+    DTYPES = ('float32', 'float64', 'int32', 'int64', 'uint8')
+
+    def __init__(self, root, records, read_size=1024 * 1024, chunk_rows=65536):
+        self.root = root
+        self.records = records
+        self.read_size = read_size
+        self.chunk_rows = chunk_rows
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def create(self, name, fmt, dtype='float32', header=False):
+        if fmt not in self.FORMATS:
+            raise DatasetError(f'不支持的数据集格式: {fmt}')
+        if dtype not in self.DTYPES:
+            raise DatasetError(f'不支持的数据类型: {dtype}')
+        os.makedirs(self.root, exist_ok=True)
+        record = self.records.add({
+            'name': name,
+            'type': 'dataset',
+            'size': 0,
+            'created_at': datetime.now().isoformat(),
+            'format': fmt,
+            'dtype': dtype,
+            'header': bool(header),
+            'status': 'uploading',
+            'uploaded_bytes': 0
+        })
+        open(self._part_path(record['id']), 'wb').close()
+        return record
+
+    def get(self, dataset_id):
+        record = self.records.get(dataset_id)
+        if record is None or record.get('type') != 'dataset':
+            raise DatasetNotFound(f'数据集不存在: {dataset_id}')
+        return record
+
+    def append_chunk(self, dataset_id, stream, offset=None):
+        # 每次请求追加一段原始字节；offset与已上传字节数不一致时拒绝，客户端据此续传
+        with self._dataset_lock(dataset_id):
+            record = self.get(dataset_id)
+            if record['status'] == 'failed' and offset == 0:
+                # 转换失败后从头重新上传，覆盖原来的数据
+                open(self._part_path(dataset_id), 'wb').close()
+                record = self.records.update(dataset_id, {'status': 'uploading', 'uploaded_bytes': 0, 'error': None})
+            if record['status'] == 'failed':
+                raise DatasetError(f'数据集转换失败: {record.get("error")}，请从offset=0重新上传')
+            if record['status'] != 'uploading':
+                raise DatasetError('数据集已完成上传')
+            uploaded = record['uploaded_bytes']
+            if offset is not None and offset != uploaded:
+                raise DatasetError(f'offset不匹配，已上传 {uploaded} 字节')
+            with open(self._part_path(dataset_id), 'ab') as f:
+                while True:
+                    block = stream.read(self.read_size)
+                    if not block:
+                        break
+                    f.write(block)
+                    uploaded += len(block)
+            return self.records.update(dataset_id, {'uploaded_bytes': uploaded})
+
+    def complete(self, dataset_id):
+        with self._dataset_lock(dataset_id):
+            record = self.get(dataset_id)
+            if record['status'] == 'ready':
+                return record
+            part = self._part_path(dataset_id)
+            target = self._npy_path(dataset_id)
+            try:
+                if record['format'] == 'npy':
+                    array = np.load(part, mmap_mode='r')
+                    shape, dtype = array.shape, array.dtype
+                    del array
+                else:
+                    shape, dtype = self._convert_csv(part, target, np.dtype(record['dtype']), record['header'])
+                if not shape or shape[0] == 0:
+                    raise ValueError('数据集为空')
+            except (OSError, ValueError) as e:
+                # 删除转换到一半的目标文件，保留原始上传直到重新上传
+                self._remove_file(target)
+                self.records.update(dataset_id, {'status': 'failed', 'error': str(e)})
+                raise DatasetError(f'数据集转换失败: {str(e)}')
+            if record['format'] == 'npy':
+                os.replace(part, target)
+            else:
+                os.remove(part)
+            return self.records.update(dataset_id, {
+                'status': 'ready',
+                'shape': list(shape),
+                'dtype': str(dtype),
+                'size': os.path.getsize(target)
+            })
+
+    def open(self, dataset_id):
+        record = self.get(dataset_id)
+        if record['status'] == 'failed':
+            raise DatasetError(f'数据集转换失败: {record.get("error")}')
+        if record['status'] != 'ready':
+            raise DatasetError(f'数据集尚未就绪: {dataset_id}')
+        return Dataset(dataset_id, self._npy_path(dataset_id), record['shape'], record['dtype'])
+
+    def delete(self, dataset_id):
+        with self._dataset_lock(dataset_id):
+            for path in (self._part_path(dataset_id), self._npy_path(dataset_id)):
+                self._remove_file(path)
+        with self._lock:
+            self._locks.pop(dataset_id, None)
+
+    def _convert_csv(self, source, target, dtype, header):
+        # 第一遍统计行数和列数，第二遍按块解析写入预先分配的.npy内存映射文件
+        rows, columns = 0, None
+        with open(source, encoding='utf-8') as f:
+            lines = self._data_lines(f, header)
+            first = next(lines, None)
+            if first is None:
+                return (0,), dtype
+            columns = len(first.split(','))
+            rows = 1 + sum(1 for _ in lines)
+
+        output = np.lib.format.open_memmap(target, mode='w+', dtype=dtype, shape=(rows, columns))
+        try:
+            with open(source, encoding='utf-8') as f:
+                lines = self._data_lines(f, header)
+                start = 0
+                while True:
+                    chunk = list(islice(lines, self.chunk_rows))
+                    if not chunk:
+                        break
+                    values = np.loadtxt(chunk, delimiter=',', dtype=dtype, ndmin=2)
+                    if values.shape[1] != columns:
+                        raise ValueError(f'第 {start + 1} 行附近的列数与首行不一致')
+                    output[start:start + len(values)] = values
+                    start += len(values)
+            output.flush()
+        finally:
+            del output
+        return (rows, columns), dtype
+
+    def _data_lines(self, f, header):
+        lines = (line for line in f if line.strip())
+        if header:
+            next(lines, None)
+        return lines
+
+    def _remove_file(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _dataset_lock(self, dataset_id):
+        with self._lock:
+            return self._locks.setdefault(dataset_id, threading.Lock())
+
+    def _part_path(self, dataset_id):
+        return os.path.join(self.root, f'{dataset_id}.part')
+
+    def _npy_path(self, dataset_id):
+        return os.path.join(self.root, f'{dataset_id}.npy')
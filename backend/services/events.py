@@ -0,0 +1,151 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from patterns.observer import Observer
+from services.serialization import json_default
+
+def format_event(event):
+    data = json.dumps(event['data'], ensure_ascii=False, default=json_default)
+    return f'id: {event["id"]}\nevent: {event["type"]}\ndata: {data}\n\n'
+
+class Subscription:
+    def __init__(self, hub, size):
+        self.hub = hub
+        self._queue = queue.Queue(maxsize=size)
+        self._overflowed = False
+        self._closed = False
+
+    def push(self, event):
+        if self._overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # 客户端消费太慢：丢弃积压事件，通知它重新拉取全量数据
+            self._overflowed = True
+
+    def stream(self, heartbeat=15.0, retry_ms=3000):
+        try:
+            # 先发送重连间隔，让响应头立即发出，客户端尽快进入open状态
+            yield f'retry: {retry_ms}\n\n'
+            while not self._closed:
+                if self._overflowed:
+                    self._drain()
+                    self._overflowed = False
+                    yield format_event(self.hub.reset_event())
+                    continue
+                try:
+                    event = self._queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    # 注释行作为心跳，保持连接并尽早发现断开的客户端
+                    yield ': ping\n\n'
+                    continue
+                if event is None:
+                    return
+                yield format_event(event)
+        finally:
+            self.hub.unsubscribe(self)
+
+    def close(self):
+        self._closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+class EventHub:
+    def __init__(self, backlog=1000, client_queue=256, max_clients=100):
+        self.client_queue = client_queue
+        self.max_clients = max_clients
+        self._events = deque(maxlen=backlog)
+        self._subscribers = set()
+        # ID从启动时间(毫秒)开始，重启后客户端携带的旧ID不会与新事件的ID重叠
+        self._last_id = int(time.time() * 1000)
+        self._published = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._last_id += 1
+            event = {'id': self._last_id, 'type': event_type, 'data': data}
+            self._events.append(event)
+            self._published += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(event)
+        return event
+
+    def subscribe(self, last_event_id=None):
+        # 返回订阅对象；last_event_id之后的事件仍在回放缓冲区内时先补发
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self, self.client_queue)
+            if last_event_id is not None and last_event_id != self._last_id:
+                first_id = self._events[0]['id'] if self._events else self._last_id + 1
+                if last_event_id > self._last_id or last_event_id + 1 < first_id:
+                    # ID来自重启前的进程，或缺口已超出回放缓冲区，直接让客户端重新拉取
+                    subscription.push(self._reset_event())
+                else:
+                    for event in self._events:
+                        if event['id'] > last_event_id:
+                            subscription.push(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def reset_event(self):
+        with self._lock:
+            return self._reset_event()
+
+    def _reset_event(self):
+        # reset不占用新ID，客户端收到后重新拉取全量数据并从当前ID继续
+        return {'id': self._last_id, 'type': 'reset', 'data': {'last_id': self._last_id}}
+
+    def close(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'published': self._published,
+                'last_id': self._last_id,
+                'backlog': len(self._events)
+            }
+
+class StreamObserver(Observer):
+    # 把结果推送给订阅者，并附带与上一次相比发生变化的统计字段
+    def __init__(self, hub, stats=None):
+        self.hub = hub
+        self.stats = stats
+        self._last_stats = {}
+
+    def update(self, result):
+        self.hub.publish('result', result)
+        self.publish_stats()
+
+    def publish_stats(self):
+        if self.stats is None:
+            return
+        current = self.stats()
+        delta = {key: value for key, value in current.items() if self._last_stats.get(key) != value}
+        self._last_stats = current
+        if delta:
+            self.hub.publish('stats', delta)
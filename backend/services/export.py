@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import zlib
+
+FORMATS = {
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv')
+}
+
+SECTIONS = ('history', 'logs')
+
+CSV_COLUMNS = ('section', 'id', 'timestamp', 'task', 'strategy', 'accuracy', 'latency_ms', 'status', 'level', 'message')
+
+class StreamingExporter:
+    def __init__(self, sources, chunk_size=64 * 1024):
+        # sources: {section: callable(since, until) -> 逐条产出记录的迭代器}
+        self.sources = sources
+        self.chunk_size = chunk_size
+
+    def stream(self, fmt, meta, sections=SECTIONS, since=None, until=None, compress=False):
+        writer = {'json': self._json, 'ndjson': self._ndjson, 'csv': self._csv}[fmt]
+        pieces = writer(meta, sections, since, until)
+        chunks = self._chunked(pieces)
+        if compress:
+            chunks = self._gzip(chunks)
+        return chunks
+
+    def _records(self, sections, since, until):
+        for section in sections:
+            for entry in self.sources[section](since, until):
+                yield section, entry
+
+    def _json(self, meta, sections, since, until):
+        yield '{"status": "success", "format": "json", "data": {'
+        yield '"timestamp": ' + json.dumps(meta['timestamp'])
+        yield ', "config": ' + json.dumps(meta['config'], ensure_ascii=False)
+        for section in sections:
+            yield f', "{section}": ['
+            first = True
+            for entry in self.sources[section](since, until):
+                yield ('' if first else ', ') + json.dumps(entry, ensure_ascii=False)
+                first = False
+            yield ']'
+        yield '}}'
+
+    def _ndjson(self, meta, sections, since, until):
+        yield json.dumps(dict(meta, section='meta'), ensure_ascii=False) + '\n'
+        for section, entry in self._records(sections, since, until):
+            yield json.dumps(dict(entry, section=section), ensure_ascii=False) + '\n'
+
+    def _csv(self, meta, sections, since, until):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for section, entry in self._records(sections, since, until):
+            writer.writerow(dict(entry, section=section))
+            if buffer.tell() >= self.chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def _chunked(self, pieces):
+        # 合并小片段，按固定大小输出，内存占用与导出总量无关
+        parts = []
+        size = 0
+        for piece in pieces:
+            data = piece.encode('utf-8')
+            parts.append(data)
+            size += len(data)
+            if size >= self.chunk_size:
+                yield b''.join(parts)
+                parts = []
+                size = 0
+        if parts:
+            yield b''.join(parts)
+
+    def _gzip(self, chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
@@ -0,0 +1,124 @@
+import threading
+
+class HistoryStore:
+    def __init__(self, capacity=10000):
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._index = {}
+        self._next_id = 1
+        self._head = 0
+        self._size = 0
+        self._deleted = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        # listener(entry, reason)，reason为'evict'或'delete'
+        self._listeners.append(listener)
+
+    def add(self, entry):
+        return self.add_many([entry])[0]
+
+    def add_many(self, entries):
+        removed = []
+        stored = []
+        with self._lock:
+            for entry in entries:
+                entry = dict(entry, id=self._next_id)
+                self._next_id += 1
+                slot = self._head
+                if self._size == self.capacity:
+                    old = self._slots[slot]
+                    if old is None:
+                        self._deleted -= 1
+                    else:
+                        del self._index[old['id']]
+                        removed.append(old)
+                else:
+                    self._size += 1
+                self._slots[slot] = entry
+                self._index[entry['id']] = slot
+                self._head = (slot + 1) % self.capacity
+                stored.append(entry)
+        self._notify(removed, 'evict')
+        return stored
+
+    def get(self, entry_id):
+        slot = self._index.get(entry_id)
+        return self._slots[slot] if slot is not None else None
+
+    def delete(self, entry_id):
+        with self._lock:
+            slot = self._index.pop(entry_id, None)
+            if slot is None:
+                return False
+            entry = self._slots[slot]
+            self._slots[slot] = None
+            self._deleted += 1
+            if self._deleted > max(16, self._size // 8):
+                self._compact()
+        self._notify([entry], 'delete')
+        return True
+
+    def page(self, offset, limit):
+        # 最新的记录在前；无删除空洞时直接按下标定位
+        with self._lock:
+            if offset < 0 or limit <= 0:
+                return []
+            newest = self._head - 1
+            if self._deleted == 0:
+                end = min(offset + limit, self._size)
+                return [self._slots[(newest - i) % self.capacity] for i in range(offset, end)]
+            result = []
+            skipped = 0
+            for i in range(self._size):
+                entry = self._slots[(newest - i) % self.capacity]
+                if entry is None:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                result.append(entry)
+                if len(result) == limit:
+                    break
+            return result
+
+    def latest(self):
+        page = self.page(0, 1)
+        return page[0] if page else None
+
+    def entries(self):
+        # 从旧到新的快照
+        with self._lock:
+            start = self._head - self._size
+            slots = [self._slots[(start + i) % self.capacity] for i in range(self._size)]
+        return [entry for entry in slots if entry is not None]
+
+    def iter_entries(self, since=None, until=None):
+        # 快照只复制引用，序列化由调用方按需逐条完成
+        for entry in self.entries():
+            if since is not None and entry['timestamp'] < since:
+                continue
+            if until is not None and entry['timestamp'] > until:
+                continue
+            yield entry
+
+    def __len__(self):
+        return self._size - self._deleted
+
+    def _compact(self):
+        start = self._head - self._size
+        live = [self._slots[(start + i) % self.capacity] for i in range(self._size)]
+        live = [entry for entry in live if entry is not None]
+        self._slots = live + [None] * (self.capacity - len(live))
+        self._index = {entry['id']: slot for slot, entry in enumerate(live)}
+        self._size = len(live)
+        self._head = self._size % self.capacity
+        self._deleted = 0
+
+    def _notify(self, entries, reason):
+        for entry in entries:
+            for listener in self._listeners:
+                listener(entry, reason)
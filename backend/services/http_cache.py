@@ -0,0 +1,50 @@
+import hashlib
+import json
+import threading
+
+from flask import Response, request
+
+class CachedBody:
+    def __init__(self, body, version):
+        self.body = body
+        self.version = version
+        self.etag = hashlib.sha1(body).hexdigest()
+
+class ResponseCache:
+    # 预先序列化的响应体，按版本号失效；内容不变时客户端通过ETag得到304
+    def __init__(self, mimetype='application/json'):
+        self.mimetype = mimetype
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build, version=0):
+        # key为None时只生成响应体和ETag，不缓存
+        entry = self._entries.get(key) if key is not None else None
+        if entry is not None and entry.version == version:
+            return entry
+        body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entry = CachedBody(body, version)
+        if key is None:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def respond(self, key, build, version=0, max_age=None):
+        entry = self.get(key, build, version)
+        response = Response(entry.body, mimetype=self.mimetype)
+        response.set_etag(entry.etag)
+        if max_age:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        else:
+            # 每次都向服务端验证，内容未变时只返回304
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
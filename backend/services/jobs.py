@@ -0,0 +1,248 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class JobCancelled(Exception):
+    pass
+
+class JobQueueFull(Exception):
+    pass
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+def job_key(job_id):
+    return f'job:{job_id}'
+
+def cancel_key(job_id):
+    return f'job_cancel:{job_id}'
+
+class Job:
+    def __init__(self, params, stages, stage_labels=None, store=None):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = 'pending'
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._stage_labels = stage_labels or {}
+        self._stages = OrderedDict(
+            (stage, {'status': 'pending', 'started_at': None, 'duration_ms': None, '_start': None})
+            for stage in stages
+        )
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        # 可选的共享存储，多worker部署时任意worker都能查询和取消任务
+        self._store = store
+
+    def is_cancel_requested(self):
+        if self._cancel_event.is_set():
+            return True
+        if self._store is not None and self._store.get(cancel_key(self.id)):
+            # 其他worker收到的取消请求
+            self._cancel_event.set()
+            return True
+        return False
+
+    def request_cancel(self):
+        self._cancel_event.set()
+
+    def on_stage(self, stage, status):
+        # 阶段之间检查取消请求，实现协作式取消
+        if status == 'running' and self.is_cancel_requested():
+            raise JobCancelled()
+        with self._lock:
+            info = self._stages.setdefault(
+                stage, {'status': 'pending', 'started_at': None, 'duration_ms': None, '_start': None}
+            )
+            info['status'] = status
+            if status == 'running':
+                info['started_at'] = datetime.now().isoformat()
+                info['_start'] = time.perf_counter()
+            elif info['_start'] is not None:
+                info['duration_ms'] = round((time.perf_counter() - info['_start']) * 1000, 3)
+        self.publish()
+
+    def mark_running(self):
+        with self._lock:
+            self.status = 'running'
+            self.started_at = datetime.now().isoformat()
+        self.publish()
+
+    def mark_finished(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = datetime.now().isoformat()
+            for info in self._stages.values():
+                if info['status'] == 'running':
+                    info['status'] = status
+        self.publish()
+
+    def publish(self):
+        if self._store is not None:
+            self._store.set(job_key(self.id), self.to_dict())
+
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            stages = [
+                {
+                    'stage': stage,
+                    'step': self._stage_labels.get(stage, stage),
+                    'status': info['status'],
+                    'started_at': info['started_at'],
+                    'duration_ms': info['duration_ms']
+                }
+                for stage, info in self._stages.items()
+            ]
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'params': self.params,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'stages': stages,
+                'error': self.error
+            }
+            if include_result:
+                data['result'] = self.result
+        return data
+
+class JobManager:
+    def __init__(self, max_workers=4, max_pending=32, retention=200, store=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._jobs = OrderedDict()
+        self._futures = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, runner, params, stages, stage_labels=None):
+        with self._lock:
+            if self._active >= self.max_workers + self.max_pending:
+                raise JobQueueFull()
+            job = Job(params, stages, stage_labels, store=self._store)
+            self._jobs[job.id] = job
+            self._active += 1
+            self._evict_finished()
+        if self._store is not None:
+            # 开始执行前写入共享存储，避免pending状态覆盖执行中的状态
+            job.publish()
+            self._remember(job.id)
+        with self._lock:
+            self._futures[job.id] = self._executor.submit(self._run, job, runner)
+        return job
+
+    def _run(self, job, runner):
+        try:
+            if job.is_cancel_requested():
+                job.mark_finished('cancelled')
+                return
+            job.mark_running()
+            result = runner(job)
+            job.mark_finished('completed', result=result)
+        except JobCancelled:
+            job.mark_finished('cancelled')
+        except Exception as e:
+            job.mark_finished('failed', error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._futures.pop(job.id, None)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def snapshot(self, job_id, include_result=True):
+        # 本worker的任务直接读取，其他worker的任务从共享存储读取
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict(include_result)
+        if self._store is None:
+            return None
+        data = self._store.get(job_key(job_id))
+        if data is not None and not include_result:
+            data.pop('result', None)
+        return data
+
+    def list(self, limit=50):
+        if self._store is not None:
+            job_ids = (self._store.get('jobs') or [])[-limit:]
+            snapshots = (self.snapshot(job_id, include_result=False) for job_id in reversed(job_ids))
+            return [data for data in snapshots if data is not None]
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:]
+        return [job.to_dict(include_result=False) for job in reversed(jobs)]
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            # 任务在其他worker上执行：写入取消标记，由执行它的worker在阶段之间检查
+            data = self.snapshot(job_id, include_result=False)
+            if data is not None and data['status'] in ('pending', 'running'):
+                self._store.set(cancel_key(job_id), True)
+            return data
+        if job.is_finished():
+            return job.to_dict(include_result=False)
+        job.request_cancel()
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # 尚未开始执行，直接标记为已取消
+            job.mark_finished('cancelled')
+            with self._lock:
+                self._active -= 1
+                self._futures.pop(job_id, None)
+        return job.to_dict(include_result=False)
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == 'running')
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'active': self._active,
+                'running': running,
+                'tracked': len(self._jobs)
+            }
+
+    def _remember(self, job_id):
+        # 共享存储只保留最近retention个任务，更早且已结束的任务状态一并删除；
+        # 未结束的任务之后还会写入状态，保留到结束后再淘汰
+        while True:
+            job_ids = self._store.get('jobs')
+            updated = (job_ids or []) + [job_id]
+            expired = [old_id for old_id in updated[:-self.retention] if self._is_finished_in_store(old_id)]
+            kept = [item for item in updated if item not in expired]
+            if self._store.compare_and_set('jobs', job_ids, kept):
+                break
+        for old_id in expired:
+            self._store.delete(job_key(old_id))
+            self._store.delete(cancel_key(old_id))
+
+    def _is_finished_in_store(self, job_id):
+        data = self._store.get(job_key(job_id))
+        return data is None or data['status'] in FINISHED_STATUSES
+
+    def _evict_finished(self):
+        if len(self._jobs) <= self.retention:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.retention:
+                break
+            if self._jobs[job_id].is_finished():
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
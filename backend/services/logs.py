@@ -0,0 +1,135 @@
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+class _LevelIndex:
+    def __init__(self):
+        self._ids = []
+        self._head = 0
+
+    def append(self, entry_id):
+        self._ids.append(entry_id)
+
+    def evict(self, entry_id):
+        # 日志按ID顺序淘汰，被淘汰的一定是该级别最旧的一条
+        if self._head < len(self._ids) and self._ids[self._head] == entry_id:
+            self._head += 1
+            if self._head > 1024 and self._head * 2 > len(self._ids):
+                del self._ids[:self._head]
+                self._head = 0
+
+    def latest(self, limit):
+        start = max(self._head, len(self._ids) - limit)
+        return self._ids[start:]
+
+    def after(self, since_id, limit):
+        start = bisect_right(self._ids, since_id, lo=self._head)
+        return self._ids[start:start + limit], start + limit < len(self._ids)
+
+    def __len__(self):
+        return len(self._ids) - self._head
+
+class LogStore:
+    def __init__(self, capacity=100000):
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._levels = {}
+        self._last_id = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def append(self, level, message):
+        return self.append_many([(level, message)])[0]
+
+    def append_many(self, items):
+        stored = []
+        with self._lock:
+            for level, message in items:
+                self._last_id += 1
+                entry = {
+                    'id': self._last_id,
+                    'timestamp': datetime.now().isoformat(),
+                    'level': level,
+                    'message': message
+                }
+                slot = (entry['id'] - 1) % self.capacity
+                old = self._slots[slot]
+                if old is not None:
+                    self._levels[old['level']].evict(old['id'])
+                self._slots[slot] = entry
+                self._levels.setdefault(level, _LevelIndex()).append(entry['id'])
+                stored.append(entry)
+        for listener in self._listeners:
+            for entry in stored:
+                listener(entry)
+        return stored
+
+    def query(self, level=None, limit=50, since_id=None):
+        # 返回 (符合条件的总数, 最新在前的日志, 游标, 是否还有更多)
+        limit = max(0, limit)
+        with self._lock:
+            first_id = self._first_id()
+            if level:
+                index = self._levels.get(level)
+                if index is None:
+                    return 0, [], since_id or self._last_id, False
+                total = len(index)
+                if since_id is None:
+                    ids, has_more = index.latest(limit), False
+                else:
+                    ids, has_more = index.after(since_id, limit)
+            else:
+                total = self._last_id - first_id + 1
+                if since_id is None:
+                    ids = range(max(first_id, self._last_id - limit + 1), self._last_id + 1)
+                    has_more = False
+                else:
+                    start = max(since_id + 1, first_id)
+                    end = min(start + limit, self._last_id + 1)
+                    ids = range(start, end)
+                    has_more = end <= self._last_id
+            entries = [self._slots[(entry_id - 1) % self.capacity] for entry_id in ids]
+            if since_id is None:
+                cursor = self._last_id
+            else:
+                cursor = entries[-1]['id'] if entries else since_id
+        entries.reverse()
+        return total, entries, cursor, has_more
+
+    def entries(self):
+        with self._lock:
+            first_id = self._first_id()
+            return [self._slots[(entry_id - 1) % self.capacity] for entry_id in range(first_id, self._last_id + 1)]
+
+    def iter_entries(self, since=None, until=None, chunk_size=1000):
+        # 按ID分块读取，每块只短暂持有锁
+        with self._lock:
+            next_id = self._first_id()
+        while True:
+            with self._lock:
+                next_id = max(next_id, self._first_id())
+                end = min(next_id + chunk_size, self._last_id + 1)
+                chunk = [self._slots[(entry_id - 1) % self.capacity] for entry_id in range(next_id, end)]
+            if not chunk:
+                return
+            next_id = end
+            for entry in chunk:
+                if since is not None and entry['timestamp'] < since:
+                    continue
+                if until is not None and entry['timestamp'] > until:
+                    return
+                yield entry
+
+    def last_id(self):
+        return self._last_id
+
+    def __len__(self):
+        return self._last_id - self._first_id() + 1
+
+    def _first_id(self):
+        return max(1, self._last_id - self.capacity + 1)
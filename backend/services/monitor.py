@@ -0,0 +1,103 @@
+import gc
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+def _read_proc_status():
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM', 'Threads'):
+                    values[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return values
+
+def _count_open_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+class ResourceSampler:
+    def __init__(self, interval=5.0, size=60, probes=None):
+        self.interval = interval
+        self.size = size
+        # probes: {name: callable() -> int}，额外采集的指标(如缓存模型持有的数组字节数)
+        self.probes = probes or {}
+        self._samples = deque(maxlen=size)
+        self._last_cpu = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # fork之后的子进程需要重新启动采样线程
+            self._pid = os.getpid()
+            self._samples.clear()
+            self._last_cpu = None
+            self._stop.clear()
+            self.collect()
+            self._thread = threading.Thread(target=self._loop, name='resource-sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def collect(self):
+        now = time.monotonic()
+        times = os.times()
+        cpu_time = times.user + times.system
+        cpu_percent = None
+        if self._last_cpu is not None:
+            elapsed = now - self._last_cpu[0]
+            if elapsed > 0:
+                cpu_percent = round((cpu_time - self._last_cpu[1]) / elapsed * 100, 1)
+        self._last_cpu = (now, cpu_time)
+
+        status = _read_proc_status()
+        gc_stats = gc.get_stats()
+        sample = {
+            'timestamp': datetime.now().isoformat(),
+            'rss_bytes': status['VmRSS'] * 1024 if 'VmRSS' in status else None,
+            'peak_rss_bytes': status['VmHWM'] * 1024 if 'VmHWM' in status else None,
+            'cpu_time': round(cpu_time, 3),
+            'cpu_percent': cpu_percent,
+            'threads': status.get('Threads', threading.active_count()),
+            'open_fds': _count_open_fds(),
+            'gc': {
+                'counts': list(gc.get_count()),
+                'collections': [generation['collections'] for generation in gc_stats],
+                'collected': sum(generation['collected'] for generation in gc_stats)
+            }
+        }
+        for name, probe in self.probes.items():
+            try:
+                sample[name] = probe()
+            except Exception:
+                sample[name] = None
+        self._samples.append(sample)
+        return sample
+
+    def latest(self):
+        return self._samples[-1] if self._samples else None
+
+    def series(self, limit=None):
+        samples = list(self._samples)
+        return samples[-limit:] if limit else samples
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            if self._pid != os.getpid():
+                return
+            self.collect()
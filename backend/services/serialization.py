@@ -0,0 +1,114 @@
+import json
+import struct
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+BINARY_MIMETYPE = 'application/vnd.ai-result+binary'
+
+def json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def to_builtin(obj, precision=None):
+    # 递归转换为Python内置类型；浮点数组先整体round再tolist，比逐个元素处理快
+    if isinstance(obj, dict):
+        return {key: to_builtin(value, precision) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_builtin(value, precision) for value in obj]
+    if isinstance(obj, np.ndarray):
+        if precision is not None and obj.dtype.kind == 'f':
+            obj = np.round(obj, precision)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if precision is not None and isinstance(obj, float):
+        return round(obj, precision)
+    return obj
+
+def project(obj, fields):
+    # fields为点分路径列表，如 ['type', 'metrics.accuracy', 'chart_data']
+    if not fields or not isinstance(obj, dict):
+        return obj
+    projected = {}
+    for field in fields:
+        parts = field.split('.')
+        value = obj
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+def encode_binary(obj):
+    # 布局: <uint32 头部长度> <UTF-8 JSON头部(补空格对齐4字节)> <float32小端数组依次拼接>
+    # 头部中的浮点数组替换为 {"$buffer": 序号, "offset": 字节偏移, "shape": 形状}
+    buffers = []
+    offset = 0
+
+    def extract(value):
+        nonlocal offset
+        if isinstance(value, dict):
+            return {key: extract(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [extract(item) for item in value]
+        if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+            data = np.ascontiguousarray(value, dtype='<f4')
+            buffers.append(data)
+            ref = {'$buffer': len(buffers) - 1, 'offset': offset, 'shape': list(value.shape)}
+            offset += data.nbytes
+            return ref
+        return value
+
+    header = json.dumps(extract(obj), default=json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+    return b''.join([struct.pack('<I', len(header)), header] + [data.tobytes() for data in buffers])
+
+def available_mimetypes():
+    mimetypes = [JSON_MIMETYPE, BINARY_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.insert(1, MSGPACK_MIMETYPE)
+    return mimetypes
+
+def negotiate(accept_mimetypes):
+    return accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIMETYPE)
+
+def encode(obj, mimetype=JSON_MIMETYPE, precision=None):
+    if mimetype == BINARY_MIMETYPE:
+        return encode_binary(obj)
+    if mimetype == MSGPACK_MIMETYPE:
+        # 浮点数编码为float32，图表数据体积减半
+        return msgpack.packb(to_builtin(obj, precision), use_bin_type=True, use_single_float=True)
+    if precision is not None:
+        obj = to_builtin(obj, precision)
+    return json.dumps(obj, default=json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    # 直接编码NumPy数组和标量；precision不为None时浮点数统一保留指定位数
+    precision = None
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (np.ndarray, np.generic)):
+            return json_default(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if self.precision is not None:
+            obj = to_builtin(obj, self.precision)
+        return super().dumps(obj, **kwargs)
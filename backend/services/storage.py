@@ -0,0 +1,649 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from patterns.observer import StatsAggregator
+from services.history import HistoryStore
+from services.logs import LogStore
+from services.serialization import json_default
+
+class MemoryDataRecordStore:
+    def __init__(self):
+        self._records = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            record = dict(record, id=self._next_id)
+            self._next_id += 1
+            self._records[record['id']] = record
+        return record
+
+    def update(self, record_id, fields):
+        with self._lock:
+            record = self._records.get(record_id)
+            if record is None:
+                return None
+            record = dict(record, **fields)
+            self._records[record_id] = record
+        return record
+
+    def get(self, record_id):
+        return self._records.get(record_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._records.values())
+
+    def delete(self, record_id):
+        with self._lock:
+            return self._records.pop(record_id, None)
+
+    def __len__(self):
+        return len(self._records)
+
+class MemoryKeyValueStore:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def delete(self, key):
+        self._values.pop(key, None)
+
+    def compare_and_set(self, key, expected, value):
+        with self._lock:
+            if self._values.get(key) != expected:
+                return False
+            self._values[key] = value
+            return True
+
+class MemoryStorage:
+    backend = 'memory'
+    shared = False
+    persistent = False
+
+    def __init__(self, history_capacity=10000, log_capacity=100000):
+        self.history = HistoryStore(capacity=history_capacity)
+        self.logs = LogStore(capacity=log_capacity)
+        self.data_records = MemoryDataRecordStore()
+        self.kv = MemoryKeyValueStore()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    accuracy REAL NOT NULL,
+    latency_ms REAL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_task ON history(task);
+CREATE INDEX IF NOT EXISTS idx_history_strategy ON history(strategy);
+CREATE TABLE IF NOT EXISTS history_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    accuracy_sum REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history_counts (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (kind, value)
+);
+CREATE TABLE IF NOT EXISTS latency_bounds (
+    bucket INTEGER PRIMARY KEY,
+    upper REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_latency_bounds_upper ON latency_bounds(upper);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_level ON logs(level, id);
+CREATE TABLE IF NOT EXISTS log_counts (
+    level TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS data_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    type TEXT,
+    size TEXT,
+    created_at TEXT NOT NULL,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+# 历史统计由触发器在写入/删除/淘汰历史的同一事务内维护，/api/stats只读取计数行
+LATENCY_BUCKET = '''COALESCE(
+    (SELECT bucket FROM latency_bounds WHERE upper >= {row}.latency_ms ORDER BY upper LIMIT 1),
+    (SELECT COUNT(*) FROM latency_bounds)
+)'''
+
+HISTORY_STATS_TRIGGERS = f'''
+CREATE TRIGGER IF NOT EXISTS history_stats_insert AFTER INSERT ON history BEGIN
+    UPDATE history_totals SET count = count + 1, completed = completed + (NEW.status = 'completed'),
+        accuracy_sum = accuracy_sum + NEW.accuracy WHERE id = 1;
+    INSERT INTO history_counts (kind, value, count) VALUES ('task', NEW.task, 1)
+        ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+    INSERT INTO history_counts (kind, value, count) VALUES ('strategy', NEW.strategy, 1)
+        ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+    INSERT INTO history_counts (kind, value, count)
+        SELECT 'latency', {LATENCY_BUCKET.format(row='NEW')}, 1 WHERE NEW.latency_ms IS NOT NULL
+        ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS history_stats_delete AFTER DELETE ON history BEGIN
+    UPDATE history_totals SET count = count - 1, completed = completed - (OLD.status = 'completed'),
+        accuracy_sum = accuracy_sum - OLD.accuracy WHERE id = 1;
+    UPDATE history_counts SET count = count - 1 WHERE kind = 'task' AND value = OLD.task;
+    UPDATE history_counts SET count = count - 1 WHERE kind = 'strategy' AND value = OLD.strategy;
+    UPDATE history_counts SET count = count - 1
+        WHERE OLD.latency_ms IS NOT NULL AND kind = 'latency' AND value = {LATENCY_BUCKET.format(row='OLD')};
+    DELETE FROM history_counts WHERE kind = 'task' AND value = OLD.task AND count <= 0;
+    DELETE FROM history_counts WHERE kind = 'strategy' AND value = OLD.strategy AND count <= 0;
+    DELETE FROM history_counts WHERE kind = 'latency' AND count <= 0;
+END;
+'''
+
+# 日志条数按级别由触发器维护，'*'行为总数；轮询读取计数行，与保留条数无关
+LOG_COUNT_TRIGGERS = '''
+CREATE TRIGGER IF NOT EXISTS log_counts_insert AFTER INSERT ON logs BEGIN
+    UPDATE log_counts SET count = count + 1 WHERE level = '*';
+    INSERT INTO log_counts (level, count) VALUES (NEW.level, 1)
+        ON CONFLICT (level) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS log_counts_delete AFTER DELETE ON logs BEGIN
+    UPDATE log_counts SET count = count - 1 WHERE level IN ('*', OLD.level);
+END;
+'''
+
+HISTORY_COLUMNS = ('id', 'task', 'strategy', 'timestamp', 'accuracy', 'latency_ms', 'status')
+LOG_COLUMNS = ('id', 'timestamp', 'level', 'message')
+
+INSERT_HISTORY = 'INSERT INTO history (task, strategy, timestamp, accuracy, latency_ms, status) VALUES (?, ?, ?, ?, ?, ?)'
+INSERT_LOG = 'INSERT INTO logs (timestamp, level, message) VALUES (?, ?, ?)'
+
+class SQLiteDatabase:
+    def __init__(self, path, flush_interval=0.05, batch_size=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._after_flush = []
+        self._flusher = None
+        self._flusher_pid = None
+        self._closed = False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection().executescript(SCHEMA)
+        atexit.register(self.close)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def connection(self):
+        # 每个线程(以及fork后的每个进程)使用独立连接
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def transaction(self):
+        return _Transaction(self.connection())
+
+    def add_flush_hook(self, hook):
+        # hook(conn) 在每次批量写入的同一事务内执行
+        self._after_flush.append(hook)
+
+    def enqueue(self, sql, params, callback=None):
+        self._ensure_flusher()
+        with self._pending_lock:
+            self._pending.append((sql, params, callback))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            callbacks = []
+            try:
+                with self.transaction() as conn:
+                    for sql, params, callback in pending:
+                        cursor = conn.execute(sql, params)
+                        if callback is not None:
+                            callbacks.append((callback, cursor.lastrowid))
+                    for hook in self._after_flush:
+                        hook(conn)
+            except sqlite3.Error:
+                # 写入失败时放回队列，下次刷新重试
+                with self._pending_lock:
+                    self._pending = pending + self._pending
+                raise
+            for callback, rowid in callbacks:
+                callback(rowid)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+
+    def _after_fork(self):
+        # 子进程不继承父进程的待写队列和刷新线程
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._local = threading.local()
+        self._flusher = None
+        self._flusher_pid = None
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher_pid == os.getpid():
+            return
+        with self._pending_lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name='sqlite-flusher', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
+        return False
+
+class SQLiteHistoryStore:
+    def __init__(self, db, capacity=10000):
+        self.db = db
+        self.capacity = capacity
+        self._listeners = []
+        self._init_stats()
+        db.add_flush_hook(self._prune)
+
+    def _init_stats(self):
+        self.db.connection().executescript(HISTORY_STATS_TRIGGERS)
+        with self.db.transaction() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO latency_bounds (bucket, upper) VALUES (?, ?)',
+                enumerate(StatsAggregator.LATENCY_BOUNDS)
+            )
+            if conn.execute('SELECT 1 FROM history_totals WHERE id = 1').fetchone() is None:
+                # 新建的数据库或升级前已有的历史：全表统计一次，之后由触发器增量维护
+                self._rebuild_stats(conn)
+
+    def _rebuild_stats(self, conn):
+        conn.execute('DELETE FROM history_totals')
+        conn.execute('DELETE FROM history_counts')
+        conn.execute(
+            "INSERT INTO history_totals (id, count, completed, accuracy_sum) "
+            "SELECT 1, COUNT(*), COALESCE(SUM(status = 'completed'), 0), COALESCE(SUM(accuracy), 0) FROM history"
+        )
+        for kind in ('task', 'strategy'):
+            conn.execute(
+                f"INSERT INTO history_counts (kind, value, count) SELECT '{kind}', {kind}, COUNT(*) FROM history GROUP BY {kind}"
+            )
+        conn.execute(
+            f"INSERT INTO history_counts (kind, value, count) "
+            f"SELECT 'latency', {LATENCY_BUCKET.format(row='history')} AS bucket, COUNT(*) FROM history "
+            f"WHERE latency_ms IS NOT NULL GROUP BY bucket"
+        )
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def add(self, entry):
+        return self.add_many([entry])[0]
+
+    def add_many(self, entries):
+        stored = []
+        for entry in entries:
+            entry = dict(entry, id=None)
+            # ID由SQLite在批量写入时按提交顺序分配，多个进程共享数据库时ID顺序即写入顺序
+            self.db.enqueue(INSERT_HISTORY, tuple(entry.get(column) for column in HISTORY_COLUMNS[1:]), self._on_written(entry))
+            stored.append(entry)
+        # 调用方需要立即返回执行ID，等待本批次提交
+        self.db.flush()
+        return stored
+
+    def get(self, entry_id):
+        self.db.flush()
+        row = self._read('SELECT * FROM history WHERE id = ?', (entry_id,))
+        return dict(row[0]) if row else None
+
+    def delete(self, entry_id):
+        self.db.flush()
+        with self.db.transaction() as conn:
+            row = conn.execute('SELECT * FROM history WHERE id = ?', (entry_id,)).fetchone()
+            if row is not None:
+                conn.execute('DELETE FROM history WHERE id = ?', (entry_id,))
+        if row is None:
+            return False
+        self._notify([dict(row)], 'delete')
+        return True
+
+    def page(self, offset, limit):
+        if offset < 0 or limit <= 0:
+            return []
+        self.db.flush()
+        rows = self._read('SELECT * FROM history ORDER BY id DESC LIMIT ? OFFSET ?', (limit, offset))
+        return [dict(row) for row in rows]
+
+    def latest(self):
+        page = self.page(0, 1)
+        return page[0] if page else None
+
+    def entries(self):
+        self.db.flush()
+        return [dict(row) for row in self._read('SELECT * FROM history ORDER BY id', ())]
+
+    def iter_entries(self, since=None, until=None, chunk_size=1000):
+        self.db.flush()
+        last_id = 0
+        while True:
+            rows = self._read(
+                'SELECT * FROM history WHERE id > ? AND timestamp >= ? AND timestamp <= ? ORDER BY id LIMIT ?',
+                (last_id, since or '', until or '\uffff', chunk_size)
+            )
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_id = rows[-1]['id']
+
+    def __len__(self):
+        self.db.flush()
+        return self._read('SELECT COUNT(*) FROM history', ())[0][0]
+
+    def aggregate(self):
+        # 只读取触发器维护的计数行，与历史条数无关；多进程共享时每个worker看到相同的统计
+        self.db.flush()
+        count, completed, accuracy_sum = self._read(
+            'SELECT count, completed, accuracy_sum FROM history_totals WHERE id = 1', ()
+        )[0]
+        distributions = {'task': {}, 'strategy': {}, 'latency': {}}
+        for kind, value, value_count in self._read('SELECT kind, value, count FROM history_counts WHERE count > 0', ()):
+            distributions[kind][value] = value_count
+        buckets = [0] * (len(StatsAggregator.LATENCY_BOUNDS) + 1)
+        for bucket, value_count in distributions['latency'].items():
+            buckets[int(bucket)] = value_count
+        return {
+            'count': count,
+            'completed': completed,
+            'avg_accuracy': accuracy_sum / count if count else 0,
+            'task_distribution': distributions['task'],
+            'strategy_distribution': distributions['strategy'],
+            'latency_ms': StatsAggregator.percentiles(buckets, sum(buckets))
+        }
+
+    def _read(self, sql, params):
+        return self.db.connection().execute(sql, params).fetchall()
+
+    def _on_written(self, entry):
+        def callback(rowid):
+            entry['id'] = rowid
+        return callback
+
+    def _prune(self, conn):
+        row = conn.execute('SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?', (self.capacity,)).fetchone()
+        if row is None:
+            return
+        evicted = conn.execute('SELECT * FROM history WHERE id <= ?', (row[0],)).fetchall()
+        conn.execute('DELETE FROM history WHERE id <= ?', (row[0],))
+        self._notify([dict(entry) for entry in evicted], 'evict')
+
+    def _notify(self, entries, reason):
+        for entry in entries:
+            for listener in self._listeners:
+                listener(entry, reason)
+
+class SQLiteLogStore:
+    def __init__(self, db, capacity=100000):
+        self.db = db
+        self.capacity = capacity
+        self._listeners = []
+        self._init_counts()
+        db.add_flush_hook(self._prune)
+
+    def _init_counts(self):
+        self.db.connection().executescript(LOG_COUNT_TRIGGERS)
+        with self.db.transaction() as conn:
+            if conn.execute("SELECT 1 FROM log_counts WHERE level = '*'").fetchone() is None:
+                # 新建的数据库或升级前已有的日志：全表计数一次，之后由触发器增量维护
+                conn.execute('DELETE FROM log_counts')
+                conn.execute('INSERT INTO log_counts (level, count) SELECT level, COUNT(*) FROM logs GROUP BY level')
+                conn.execute("INSERT INTO log_counts (level, count) SELECT '*', COUNT(*) FROM logs")
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def append(self, level, message):
+        return self.append_many([(level, message)])[0]
+
+    def append_many(self, items):
+        stored = []
+        for level, message in items:
+            entry = {'id': None, 'timestamp': datetime.now().isoformat(), 'level': level, 'message': message}
+            # ID由SQLite在批量写入时按提交顺序分配，保证since_id游标跨进程单调
+            self.db.enqueue(INSERT_LOG, (entry['timestamp'], level, message), self._on_written(entry))
+            stored.append(entry)
+        return stored
+
+    def query(self, level=None, limit=50, since_id=None):
+        limit = max(0, limit)
+        self.db.flush()
+        where, params = ('WHERE level = ?', [level]) if level else ('', [])
+        total = self._count(level or '*')
+        if since_id is None:
+            rows = self._read(f'SELECT * FROM logs {where} ORDER BY id DESC LIMIT ?', params + [limit])
+            entries = [dict(row) for row in rows]
+            cursor = self.last_id()
+            return total, entries, cursor, False
+        clause = f'{where} AND id > ?' if where else 'WHERE id > ?'
+        rows = self._read(f'SELECT * FROM logs {clause} ORDER BY id LIMIT ?', params + [since_id, limit + 1])
+        has_more = len(rows) > limit
+        entries = [dict(row) for row in rows[:limit]]
+        cursor = entries[-1]['id'] if entries else since_id
+        entries.reverse()
+        return total, entries, cursor, has_more
+
+    def entries(self):
+        return list(self.iter_entries())
+
+    def iter_entries(self, since=None, until=None, chunk_size=1000):
+        self.db.flush()
+        last_id = 0
+        while True:
+            rows = self._read(
+                'SELECT * FROM logs WHERE id > ? AND timestamp >= ? AND timestamp <= ? ORDER BY id LIMIT ?',
+                (last_id, since or '', until or '\uffff', chunk_size)
+            )
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_id = rows[-1]['id']
+
+    def last_id(self):
+        return self._read('SELECT COALESCE(MAX(id), 0) FROM logs', ())[0][0]
+
+    def __len__(self):
+        self.db.flush()
+        return self._count('*')
+
+    def _count(self, level):
+        row = self._read('SELECT count FROM log_counts WHERE level = ?', (level,))
+        return row[0][0] if row else 0
+
+    def _read(self, sql, params):
+        return self.db.connection().execute(sql, params).fetchall()
+
+    def _on_written(self, entry):
+        def callback(rowid):
+            entry['id'] = rowid
+            for listener in self._listeners:
+                listener(entry)
+        return callback
+
+    def _prune(self, conn):
+        conn.execute('DELETE FROM logs WHERE id <= (SELECT MAX(id) FROM logs) - ?', (self.capacity,))
+
+class SQLiteDataRecordStore:
+    COLUMNS = ('name', 'type', 'size', 'created_at')
+
+    def __init__(self, db):
+        self.db = db
+
+    def add(self, record):
+        meta = {key: value for key, value in record.items() if key not in self.COLUMNS and key != 'id'}
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                'INSERT INTO data_records (name, type, size, created_at, meta) VALUES (?, ?, ?, ?, ?)',
+                tuple(record.get(column) for column in self.COLUMNS) + (json.dumps(meta),)
+            )
+        return dict(record, id=cursor.lastrowid)
+
+    def update(self, record_id, fields):
+        with self.db.transaction() as conn:
+            row = conn.execute('SELECT * FROM data_records WHERE id = ?', (record_id,)).fetchone()
+            if row is None:
+                return None
+            record = dict(self._to_record(row), **fields)
+            meta = {key: value for key, value in record.items() if key not in self.COLUMNS and key != 'id'}
+            conn.execute(
+                'UPDATE data_records SET name = ?, type = ?, size = ?, created_at = ?, meta = ? WHERE id = ?',
+                tuple(record.get(column) for column in self.COLUMNS) + (json.dumps(meta), record_id)
+            )
+        return record
+
+    def get(self, record_id):
+        row = self.db.connection().execute('SELECT * FROM data_records WHERE id = ?', (record_id,)).fetchone()
+        return self._to_record(row) if row is not None else None
+
+    def list(self):
+        rows = self.db.connection().execute('SELECT * FROM data_records ORDER BY id').fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def delete(self, record_id):
+        with self.db.transaction() as conn:
+            row = conn.execute('SELECT * FROM data_records WHERE id = ?', (record_id,)).fetchone()
+            conn.execute('DELETE FROM data_records WHERE id = ?', (record_id,))
+        return self._to_record(row) if row is not None else None
+
+    def __len__(self):
+        return self.db.connection().execute('SELECT COUNT(*) FROM data_records').fetchone()[0]
+
+    def _to_record(self, row):
+        record = {'id': row['id']}
+        record.update({column: row[column] for column in self.COLUMNS})
+        record.update(json.loads(row['meta'] or '{}'))
+        return record
+
+class SQLiteKeyValueStore:
+    def __init__(self, db):
+        self.db = db
+
+    def get(self, key, default=None):
+        row = self.db.connection().execute('SELECT value FROM kv WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def set(self, key, value):
+        with self.db.transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)', (key, json.dumps(value, default=json_default)))
+
+    def delete(self, key):
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM kv WHERE key = ?', (key,))
+
+    def compare_and_set(self, key, expected, value):
+        # BEGIN IMMEDIATE持有写锁，多个进程同时比较并替换也不会互相覆盖
+        with self.db.transaction() as conn:
+            row = conn.execute('SELECT value FROM kv WHERE key = ?', (key,)).fetchone()
+            current = json.loads(row[0]) if row is not None else None
+            if current != expected:
+                return False
+            conn.execute('INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)', (key, json.dumps(value, default=json_default)))
+        return True
+
+class SQLiteStorage:
+    backend = 'sqlite'
+    shared = True
+    persistent = True
+
+    def __init__(self, path, history_capacity=10000, log_capacity=100000, flush_interval=0.05):
+        self.db = SQLiteDatabase(path, flush_interval=flush_interval)
+        self.history = SQLiteHistoryStore(self.db, capacity=history_capacity)
+        self.logs = SQLiteLogStore(self.db, capacity=log_capacity)
+        self.data_records = SQLiteDataRecordStore(self.db)
+        self.kv = SQLiteKeyValueStore(self.db)
+
+    def flush(self):
+        self.db.flush()
+
+    def close(self):
+        self.db.close()
+
+def create_storage(backend='memory', path=None, history_capacity=10000, log_capacity=100000):
+    if backend == 'sqlite':
+        return SQLiteStorage(path or 'data/system.db', history_capacity=history_capacity, log_capacity=log_capacity)
+    if backend == 'memory':
+        return MemoryStorage(history_capacity=history_capacity, log_capacity=log_capacity)
+    raise ValueError(f'Unknown storage backend: {backend}')
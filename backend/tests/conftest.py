@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 后端模块以backend目录为根导入(from services... / from patterns...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
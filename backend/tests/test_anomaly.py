@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from engines.anomaly import MahalanobisScorer, chi2_quantile, top_k
+
+def test_top_k_returns_highest_scores_in_order():
+    scores = np.array([0.1, 5.0, 3.0, 9.0, 7.0])
+    assert top_k(scores, 3).tolist() == [3, 4, 1]
+
+def test_top_k_handles_k_larger_than_rows_and_zero():
+    scores = np.array([2.0, 1.0])
+    assert top_k(scores, 5).tolist() == [0, 1]
+    assert top_k(scores, 0).tolist() == []
+    assert top_k(np.empty(0), 3).tolist() == []
+
+def test_top_k_matches_full_sort():
+    scores = np.random.default_rng(0).standard_normal(10000)
+    assert top_k(scores, 50).tolist() == np.argsort(scores)[::-1][:50].tolist()
+
+def test_chi2_quantile_close_to_exact():
+    # 自由度2时卡方分布的分位数有解析解 -2ln(1-q)
+    assert chi2_quantile(0.975, 2) == pytest.approx(-2 * np.log(0.025), rel=0.02)
+    assert chi2_quantile(0.5, 10) == pytest.approx(9.342, rel=0.01)
+
+def test_chunked_mahalanobis_matches_direct_computation():
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((1000, 4)) @ rng.standard_normal((4, 4))
+    scorer = MahalanobisScorer(chunk_size=128, ridge=0).fit(data)
+    centered = data - data.mean(axis=0)
+    precision = np.linalg.inv(np.cov(data, rowvar=False))
+    expected = np.sqrt(np.einsum('ij,jk,ik->i', centered, precision, centered))
+    np.testing.assert_allclose(scorer.score(data), expected, rtol=1e-6)
+
+def test_mahalanobis_ranks_injected_outliers_first():
+    rng = np.random.default_rng(2)
+    data = rng.standard_normal((500, 5))
+    data[:5] += 8
+    scorer = MahalanobisScorer(chunk_size=64).fit(data)
+    scores = scorer.score(data)
+    assert sorted(top_k(scores, 5).tolist()) == [0, 1, 2, 3, 4]
+    assert (scores[:5] > scorer.threshold).all()
+
+@pytest.mark.parametrize('data', [
+    np.full((50, 4), 3.0),
+    np.ones((1, 4))
+])
+def test_mahalanobis_handles_zero_covariance(data):
+    scorer = MahalanobisScorer().fit(data)
+    scores = scorer.score(data)
+    assert np.all(np.isfinite(scorer.precision))
+    np.testing.assert_array_equal(scores, 0)
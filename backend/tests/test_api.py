@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+import app as backend
+from patterns.observer import Observer
+from services.datasets import DatasetStore
+
+class BlockingObserver(Observer):
+    def __init__(self, event):
+        self.event = event
+
+    def update(self, result):
+        self.event.wait(5)
+
+@pytest.fixture
+def client():
+    return backend.app.test_client()
+
+@pytest.fixture
+def upload(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, 'datasets', DatasetStore(str(tmp_path), backend.data_records))
+
+    def upload(text):
+        dataset_id = client.post('/api/datasets', json={'name': 'test.csv'}).get_json()['data']['id']
+        client.post(f'/api/datasets/{dataset_id}/chunks', data=text.encode())
+        assert client.post(f'/api/datasets/{dataset_id}/complete').status_code == 200
+        return dataset_id
+    return upload
+
+@pytest.mark.parametrize('body', [
+    [1],
+    {'runs': [1]},
+    {'runs': [{'task': 'anomaly'}, 'prediction']},
+    {'runs': []},
+    {'runs': 'anomaly'},
+    {'runs': [{'task': 'anomaly', 'seed': -1}]}
+])
+def test_batch_rejects_invalid_runs(client, body):
+    response = client.post('/api/run/batch', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+def test_batch_runs_each_item(client):
+    response = client.post('/api/run/batch', json={'runs': [{'task': 'anomaly'}, {'task': 'prediction', 'strategy': 'ensemble'}]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(item['task'], item['strategy']) for item in results] == [('anomaly', 'baseline'), ('prediction', 'ensemble')]
+
+def test_run_rejects_non_object_body(client):
+    assert client.post('/api/run', json=[1]).status_code == 400
+    assert client.post('/api/jobs', json='anomaly').status_code == 400
+
+def test_results_reflect_run_immediately(client):
+    # 异步队列被慢观察者阻塞时，最新结果仍在/api/run返回前写入
+    blocker = threading.Event()
+    slow = BlockingObserver(blocker)
+    backend.result_subject.attach(slow)
+    try:
+        for task in ['prediction', 'recommendation', 'prediction']:
+            response = client.post('/api/run', json={'task': task})
+            assert response.status_code == 200
+            latest = client.get('/api/results').get_json()
+            assert latest['execution']['id'] == response.get_json()['execution_id']
+            assert latest['type'] == task
+    finally:
+        blocker.set()
+        backend.result_subject.detach(slow)
+        backend.result_subject.flush()
+
+def test_anomaly_accepts_constant_columns(client, upload):
+    dataset_id = upload('1,2,3\n1,2,3\n1,2,3\n')
+    response = client.post('/api/run', json={'task': 'anomaly', 'dataset_id': dataset_id})
+    assert response.status_code == 200
+    assert response.get_json()['result']['anomaly_count'] == 0
+
+def test_anomaly_rejects_single_row_dataset(client, upload):
+    dataset_id = upload('1,2,3\n')
+    response = client.post('/api/run', json={'task': 'anomaly', 'dataset_id': dataset_id})
+    assert response.status_code == 400
+    assert '至少需要2行' in response.get_json()['message']
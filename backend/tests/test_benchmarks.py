@@ -0,0 +1,43 @@
+import json
+
+from benchmarks.run import compare, main
+
+def result(p50, p95, peak):
+    return {'p50_ms': p50, 'p95_ms': p95, 'peak_memory_bytes': peak}
+
+def test_missing_baseline_fails_only_when_required(tmp_path):
+    missing = str(tmp_path / 'baseline.json')
+    assert main(['--require-baseline', '--baseline', missing]) == 2
+
+def test_compare_needs_both_relative_and_absolute_increase():
+    baseline = {'fast': result(0.1, 0.2, 1000), 'slow': result(10.0, 20.0, 1000)}
+    current = {'fast': result(0.4, 0.5, 1000), 'slow': result(14.0, 20.0, 1000), 'new': result(1.0, 1.0, 1)}
+    regressions = compare(current, baseline, tolerance=0.25, memory_tolerance=0.1, min_delta_ms=0.5)
+    assert regressions == ['slow p50_ms: 14.0000 > 10.0000 (+25%)']
+
+def test_compare_flags_memory_growth():
+    regressions = compare({'a': result(1.0, 1.0, 1200)}, {'a': result(1.0, 1.0, 1000)}, 0.25, 0.1, 0.5)
+    assert regressions == ['a peak_memory_bytes: 1200 > 1000 (+10%)']
+
+def test_baseline_keeps_environment_and_old_format_still_compares(tmp_path, capsys):
+    baseline = str(tmp_path / 'baseline.json')
+    output = str(tmp_path / 'results.json')
+    args = ['--only', 'models', '--iterations', '1', '--warmup', '0', '--output', output, '--baseline', baseline]
+    assert main(args + ['--update-baseline']) == 0
+    with open(baseline) as f:
+        report = json.load(f)
+    assert {'python', 'numpy', 'machine', 'results'} <= set(report)
+
+    report['machine'] = 'other'
+    with open(baseline, 'w') as f:
+        json.dump(report, f)
+    assert main(args + ['--tolerance', '100', '--memory-tolerance', '100']) == 0
+    out = capsys.readouterr().out
+    assert 'machine other ->' in out
+    assert 'no regressions against baseline' in out
+
+    # 旧格式的基准只包含结果
+    with open(baseline, 'w') as f:
+        json.dump(report['results'], f)
+    assert main(args + ['--tolerance', '100', '--memory-tolerance', '100']) == 0
+    assert 'no regressions against baseline' in capsys.readouterr().out
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from patterns.singleton import SystemConfig
+
+@pytest.fixture
+def config():
+    config = SystemConfig.get_instance()
+    yield config
+    for session_id in ('s1', 's2', 'reader'):
+        config.clear_session(session_id)
+
+def test_session_overrides_do_not_change_global(config):
+    before = config.snapshot()
+    config.update('s1', current_task='anomaly')
+    assert config.snapshot('s1').current_task == 'anomaly'
+    assert config.snapshot('s2') == before
+    assert config.snapshot() == before
+
+def test_compare_and_set_rejects_stale_snapshot(config):
+    snapshot = config.snapshot()
+    assert config.compare_and_set(snapshot, current_strategy='ensemble').version == snapshot.version + 1
+    assert config.compare_and_set(snapshot, current_strategy='baseline') is None
+
+def test_concurrent_session_updates_never_hide_override(config):
+    config.update('reader', current_task='classification')
+    stop = threading.Event()
+
+    def writer():
+        strategies = ('baseline', 'ensemble')
+        index = 0
+        while not stop.is_set():
+            config.update('reader', current_strategy=strategies[index % 2])
+            index += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        lost = sum(config.snapshot('reader').current_task != 'classification' for _ in range(50000))
+    finally:
+        stop.set()
+        thread.join()
+    assert lost == 0
+
+def test_oldest_sessions_are_evicted(config, monkeypatch):
+    monkeypatch.setattr(SystemConfig, 'MAX_SESSIONS', 2)
+    config.update('s1', current_task='anomaly')
+    config.update('s2', current_task='prediction')
+    config.update('s1', current_strategy='ensemble')
+    config.update('reader', current_task='classification')
+    assert config.snapshot('s2').current_task == config.snapshot().current_task
+    assert config.snapshot('s1').current_task == 'anomaly'
@@ -0,0 +1,113 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from services.datasets import DatasetError, DatasetNotFound, DatasetStore
+from services.storage import MemoryDataRecordStore
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path), MemoryDataRecordStore(), chunk_rows=2)
+
+def upload(store, data, fmt='csv', **options):
+    record = store.create('test', fmt, **options)
+    store.append_chunk(record['id'], io.BytesIO(data), offset=0)
+    return record['id']
+
+def npy_bytes(array, allow_pickle=False):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=allow_pickle)
+    return buffer.getvalue()
+
+def files(store):
+    return sorted(os.listdir(store.root))
+
+def test_chunks_must_follow_uploaded_offset(store):
+    dataset_id = store.create('test', 'csv')['id']
+    assert store.append_chunk(dataset_id, io.BytesIO(b'1,2\n'), offset=0)['uploaded_bytes'] == 4
+    with pytest.raises(DatasetError, match='已上传 4 字节'):
+        store.append_chunk(dataset_id, io.BytesIO(b'3,4\n'), offset=0)
+    store.append_chunk(dataset_id, io.BytesIO(b'3,4\n'), offset=4)
+    store.append_chunk(dataset_id, io.BytesIO(b'5,6\n'))
+    record = store.complete(dataset_id)
+    assert record['shape'] == [3, 2]
+    np.testing.assert_array_equal(store.open(dataset_id).load(), [[1, 2], [3, 4], [5, 6]])
+    with pytest.raises(DatasetError, match='已完成上传'):
+        store.append_chunk(dataset_id, io.BytesIO(b'7,8\n'))
+
+def test_csv_header_and_blank_lines_are_skipped(store):
+    dataset_id = upload(store, b'a,b,c\n1,2,3\n\n4,5,6\n7,8,9\n', header=True, dtype='int32')
+    record = store.complete(dataset_id)
+    assert record['shape'] == [3, 3]
+    assert record['dtype'] == 'int32'
+    assert store.open(dataset_id).load()[2].tolist() == [7, 8, 9]
+
+@pytest.mark.parametrize('data, message', [
+    (b'1,2,3\n4,5,6\n7,8\n', '列数'),
+    (b'1,2\n3,x\n', 'x'),
+    (b'\n\n', '数据集为空')
+], ids=['ragged', 'bad_value', 'empty'])
+def test_failed_csv_removes_partial_file_and_allows_retry(store, data, message):
+    dataset_id = upload(store, data)
+    with pytest.raises(DatasetError, match=message):
+        store.complete(dataset_id)
+    assert files(store) == [f'{dataset_id}.part']
+    assert store.get(dataset_id)['status'] == 'failed'
+    with pytest.raises(DatasetError, match='重新上传'):
+        store.append_chunk(dataset_id, io.BytesIO(b'1,2\n'), offset=len(data))
+    with pytest.raises(DatasetError, match='转换失败'):
+        store.open(dataset_id)
+
+    store.append_chunk(dataset_id, io.BytesIO(b'1,2\n3,4\n'), offset=0)
+    assert store.complete(dataset_id)['shape'] == [2, 2]
+    assert store.get(dataset_id)['error'] is None
+    assert files(store) == [f'{dataset_id}.npy']
+
+def test_npy_is_validated_and_kept_as_is(store):
+    array = np.arange(12, dtype=np.float64).reshape(4, 3)
+    dataset_id = upload(store, npy_bytes(array), fmt='npy')
+    record = store.complete(dataset_id)
+    assert record['shape'] == [4, 3]
+    assert record['dtype'] == 'float64'
+    np.testing.assert_array_equal(store.open(dataset_id).load(), array)
+
+@pytest.mark.parametrize('data', [
+    b'not a numpy file',
+    npy_bytes(np.array([{'a': 1}], dtype=object), allow_pickle=True),
+    npy_bytes(np.zeros((0, 3))),
+    npy_bytes(np.float64(1.0))
+], ids=['garbage', 'object', 'empty', 'scalar'])
+def test_invalid_npy_fails(store, data):
+    dataset_id = upload(store, data, fmt='npy')
+    with pytest.raises(DatasetError):
+        store.complete(dataset_id)
+    assert store.get(dataset_id)['status'] == 'failed'
+    assert files(store) == [f'{dataset_id}.part']
+
+def test_create_rejects_unknown_format_and_dtype(store):
+    with pytest.raises(DatasetError):
+        store.create('test', 'parquet')
+    with pytest.raises(DatasetError):
+        store.create('test', 'csv', dtype='float16')
+    with pytest.raises(DatasetNotFound):
+        store.get(99)
+
+def test_delete_removes_files_and_pooled_models(tmp_path, monkeypatch):
+    import app as backend
+    from patterns.factory import AIModelFactory
+
+    monkeypatch.setattr(backend, 'datasets', DatasetStore(str(tmp_path), backend.data_records))
+    client = backend.app.test_client()
+    dataset_id = client.post('/api/datasets', json={'name': 'test.csv'}).get_json()['data']['id']
+    client.post(f'/api/datasets/{dataset_id}/chunks', data=b'1,2\n3,4\n5,7\n')
+    assert client.post(f'/api/datasets/{dataset_id}/complete').status_code == 200
+    assert client.post('/api/run', json={'task': 'anomaly', 'dataset_id': dataset_id}).status_code == 200
+    pool = AIModelFactory().pool
+    assert dataset_id in [entry['dataset_id'] for entry in pool.stats()['entries']]
+
+    assert client.delete(f'/api/data/{dataset_id}').status_code == 200
+    assert dataset_id not in [entry['dataset_id'] for entry in pool.stats()['entries']]
+    assert os.listdir(tmp_path) == []
+    assert client.get(f'/api/datasets/{dataset_id}').status_code == 404
@@ -0,0 +1,65 @@
+import queue
+import time
+
+from services.events import EventHub
+
+def queued(subscription):
+    events = []
+    while True:
+        try:
+            events.append(subscription._queue.get_nowait())
+        except queue.Empty:
+            return events
+
+def publish(hub, count):
+    return [hub.publish('log', {'n': i})['id'] for i in range(count)]
+
+def test_resume_replays_events_after_last_id():
+    hub = EventHub(backlog=10)
+    ids = publish(hub, 5)
+    events = queued(hub.subscribe(ids[1]))
+    assert [event['id'] for event in events] == ids[2:]
+    assert queued(hub.subscribe(ids[-1])) == []
+
+def test_gap_beyond_backlog_sends_reset():
+    hub = EventHub(backlog=3)
+    ids = publish(hub, 6)
+    events = queued(hub.subscribe(ids[0]))
+    assert [event['type'] for event in events] == ['reset']
+    assert events[0]['data']['last_id'] == ids[-1]
+    # 刚好接上缓冲区的第一条时仍然补发
+    assert [event['id'] for event in queued(hub.subscribe(ids[2]))] == ids[3:]
+
+def test_id_from_before_restart_sends_reset():
+    old = EventHub()
+    stale_id = publish(old, 3)[-1] + 500
+    hub = EventHub()
+    assert [event['type'] for event in queued(hub.subscribe(stale_id))] == ['reset']
+    assert [event['type'] for event in queued(hub.subscribe(500))] == ['reset']
+
+def test_restarted_hub_ids_do_not_overlap_old_ids():
+    old_ids = publish(EventHub(), 3)
+    time.sleep(0.01)
+    hub = EventHub()
+    assert [event['type'] for event in queued(hub.subscribe(old_ids[0]))] == ['reset']
+    assert publish(hub, 1)[0] > old_ids[-1]
+
+def test_overflow_drains_queue_and_sends_reset():
+    hub = EventHub(client_queue=2)
+    subscription = hub.subscribe()
+    stream = subscription.stream(heartbeat=0.01)
+    assert next(stream).startswith('retry:')
+    ids = publish(hub, 5)
+    assert 'event: reset' in next(stream)
+    publish(hub, 1)
+    assert f'id: {ids[-1] + 1}\nevent: log' in next(stream)
+    subscription.close()
+    assert list(stream) == []
+    assert hub.stats()['clients'] == 0
+
+def test_max_clients():
+    hub = EventHub(max_clients=1)
+    subscription = hub.subscribe()
+    assert hub.subscribe() is None
+    hub.unsubscribe(subscription)
+    assert hub.subscribe() is not None
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from engines.forecasting import OnlineForecaster, RollingWindow
+
+def rows(start, stop, dims=2):
+    return np.arange(start, stop, dtype=np.float64)[:, None] * np.ones(dims)
+
+def test_rolling_window_keeps_last_points_in_order():
+    window = RollingWindow(4, 2)
+    window.append(rows(0, 3))
+    assert len(window) == 3
+    np.testing.assert_array_equal(window.values(), rows(0, 3))
+    # 跨越缓冲区末尾的追加
+    window.append(rows(3, 6))
+    assert len(window) == 4
+    np.testing.assert_array_equal(window.values(), rows(2, 6))
+
+def test_rolling_window_batch_larger_than_window():
+    window = RollingWindow(4, 2)
+    window.append(rows(0, 2))
+    window.append(rows(2, 12))
+    np.testing.assert_array_equal(window.values(), rows(8, 12))
+    window.append(rows(12, 13))
+    np.testing.assert_array_equal(window.values(), rows(9, 13))
+
+def test_rolling_window_values_is_a_copy():
+    window = RollingWindow(3, 1)
+    window.append(rows(0, 2, dims=1))
+    values = window.values()
+    values[:] = -1
+    np.testing.assert_array_equal(window.values(), rows(0, 2, dims=1))
+
+def test_running_stats_match_full_history():
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((1000, 3)) * [1, 10, 100] + [5, -5, 50]
+    forecaster = OnlineForecaster(dims=3, window=16)
+    for batch in np.array_split(data, [1, 2, 10, 300, 301, 999]):
+        forecaster.append(batch)
+    stats = forecaster.stats()
+    assert stats['count'] == 1000
+    assert stats['window'] == 16
+    np.testing.assert_allclose(stats['mean'], data.mean(axis=0))
+    np.testing.assert_allclose(stats['std'], data.std(axis=0, ddof=1))
+
+def test_append_validates_points():
+    forecaster = OnlineForecaster(dims=2)
+    assert forecaster.append([1.0, 2.0]) == 1
+    with pytest.raises(ValueError):
+        forecaster.append([[1.0, 2.0, 3.0]])
+    with pytest.raises(ValueError):
+        forecaster.append([[1.0, np.nan]])
+    with pytest.raises(ValueError):
+        forecaster.append(np.empty((0, 2)))
+    assert forecaster.stats()['count'] == 1
+
+def test_seed_only_writes_empty_series():
+    forecaster = OnlineForecaster(dims=1)
+    assert forecaster.seed(rows(0, 5, dims=1))
+    assert not forecaster.seed(rows(5, 10, dims=1))
+    assert forecaster.stats()['count'] == 5
+
+def test_forecast_extends_linear_trend():
+    forecaster = OnlineForecaster(dims=2, window=32, horizon=3)
+    forecaster.append(rows(0, 100))
+    np.testing.assert_allclose(forecaster.forecast(), rows(100, 103))
+    forecaster.reset()
+    assert forecaster.stats()['count'] == 0
+    np.testing.assert_array_equal(forecaster.forecast(2), np.zeros((2, 2)))
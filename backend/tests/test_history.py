@@ -0,0 +1,65 @@
+import pytest
+
+from services.history import HistoryStore
+
+def entry(index):
+    return {'task': 'prediction', 'strategy': 'baseline', 'timestamp': f'2024-01-01T00:00:{index:02d}', 'accuracy': 0.9}
+
+def ids(entries):
+    return [item['id'] for item in entries]
+
+def test_page_returns_newest_first():
+    store = HistoryStore(capacity=10)
+    store.add_many([entry(i) for i in range(5)])
+    assert ids(store.page(0, 2)) == [5, 4]
+    assert ids(store.page(2, 10)) == [3, 2, 1]
+    assert store.page(5, 10) == []
+    assert store.latest()['id'] == 5
+
+def test_evicts_oldest_and_notifies():
+    store = HistoryStore(capacity=3)
+    removed = []
+    store.add_listener(lambda item, reason: removed.append((item['id'], reason)))
+    store.add_many([entry(i) for i in range(5)])
+    assert len(store) == 3
+    assert ids(store.entries()) == [3, 4, 5]
+    assert removed == [(1, 'evict'), (2, 'evict')]
+    assert store.get(1) is None
+
+def test_delete_skips_hole_in_pages():
+    store = HistoryStore(capacity=10)
+    store.add_many([entry(i) for i in range(5)])
+    assert store.delete(4)
+    assert not store.delete(4)
+    assert len(store) == 4
+    assert ids(store.page(0, 2)) == [5, 3]
+    assert ids(store.page(2, 2)) == [2, 1]
+
+def test_compaction_keeps_order_and_ids():
+    store = HistoryStore(capacity=64)
+    store.add_many([entry(i % 60) for i in range(64)])
+    for entry_id in range(2, 60, 2):
+        store.delete(entry_id)
+    assert len(store) == 64 - 29
+    assert ids(store.entries()) == [i for i in range(1, 65) if i >= 60 or i % 2]
+    store.add_many([entry(0)])
+    assert store.latest()['id'] == 65
+    assert store.get(65)['id'] == 65
+
+def test_evicting_deleted_slot_keeps_length():
+    store = HistoryStore(capacity=3)
+    store.add_many([entry(i) for i in range(3)])
+    store.delete(1)
+    store.add_many([entry(3)])
+    assert len(store) == 3
+    assert ids(store.entries()) == [2, 3, 4]
+
+def test_iter_entries_filters_by_timestamp():
+    store = HistoryStore(capacity=10)
+    store.add_many([entry(i) for i in range(5)])
+    selected = store.iter_entries(since='2024-01-01T00:00:01', until='2024-01-01T00:00:03')
+    assert ids(selected) == [2, 3, 4]
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        HistoryStore(capacity=0)
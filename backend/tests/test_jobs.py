@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from services.jobs import JobManager, job_key
+from services.storage import SQLiteStorage
+
+STAGES = ('load_data', 'preprocess')
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def workers(tmp_path):
+    # 两个JobManager共享一个SQLite数据库，模拟两个worker进程
+    storages = [SQLiteStorage(str(tmp_path / 'system.db')) for _ in range(2)]
+    managers = [JobManager(max_workers=1, retention=3, store=storage.kv) for storage in storages]
+    yield managers
+    for manager, storage in zip(managers, storages):
+        manager.shutdown()
+        storage.close()
+
+def blocking_runner(entered, release):
+    def runner(job):
+        job.on_stage('load_data', 'running')
+        job.on_stage('load_data', 'completed')
+        entered.set()
+        release.wait(5)
+        job.on_stage('preprocess', 'running')
+        job.on_stage('preprocess', 'completed')
+        return {'value': 1}
+    return runner
+
+def test_local_jobs_without_store():
+    manager = JobManager(max_workers=1)
+    job = manager.submit(lambda job: {'value': 1}, {'task': 'anomaly'}, STAGES)
+    assert wait_for(lambda: manager.snapshot(job.id)['status'] == 'completed')
+    assert manager.snapshot(job.id)['result'] == {'value': 1}
+    assert [item['job_id'] for item in manager.list()] == [job.id]
+    assert manager.snapshot('missing') is None
+    assert manager.cancel('missing') is None
+    manager.shutdown()
+
+def test_status_is_visible_from_other_worker(workers):
+    first, second = workers
+    entered, release = threading.Event(), threading.Event()
+    job = first.submit(blocking_runner(entered, release), {'task': 'anomaly'}, STAGES)
+    assert entered.wait(5)
+    snapshot = second.snapshot(job.id)
+    assert snapshot['status'] == 'running'
+    assert [stage['status'] for stage in snapshot['stages']] == ['completed', 'pending']
+    release.set()
+    assert wait_for(lambda: second.snapshot(job.id)['status'] == 'completed')
+    assert second.snapshot(job.id)['result'] == {'value': 1}
+    assert 'result' not in second.snapshot(job.id, include_result=False)
+    assert [item['job_id'] for item in second.list()] == [job.id]
+
+def test_cancel_from_other_worker(workers):
+    first, second = workers
+    entered, release = threading.Event(), threading.Event()
+    job = first.submit(blocking_runner(entered, release), {'task': 'anomaly'}, STAGES)
+    assert entered.wait(5)
+    queued = first.submit(lambda job: {'value': 2}, {'task': 'prediction'}, STAGES)
+    assert second.cancel(job.id)['job_id'] == job.id
+    assert second.cancel(queued.id)['status'] == 'pending'
+    release.set()
+    assert wait_for(lambda: second.snapshot(job.id)['status'] == 'cancelled')
+    assert wait_for(lambda: second.snapshot(queued.id)['status'] == 'cancelled')
+    assert second.snapshot(job.id)['stages'][1]['status'] == 'pending'
+
+def test_shared_store_keeps_recent_finished_jobs(workers):
+    first, second = workers
+    entered, release = threading.Event(), threading.Event()
+    running = second.submit(blocking_runner(entered, release), {'task': 'anomaly'}, STAGES)
+    assert entered.wait(5)
+    jobs = []
+    for _ in range(4):
+        jobs.append(first.submit(lambda job: None, {'task': 'anomaly'}, STAGES))
+        assert wait_for(jobs[-1].is_finished)
+    # 超出保留数量时淘汰已结束的任务，仍在执行的任务保留
+    assert [item['job_id'] for item in first.list()] == [job.id for job in reversed(jobs[1:])] + [running.id]
+    assert second.snapshot(jobs[0].id) is None
+    assert first._store.get(job_key(jobs[0].id)) is None
+
+    release.set()
+    assert wait_for(running.is_finished)
+    jobs.append(first.submit(lambda job: None, {'task': 'anomaly'}, STAGES))
+    assert wait_for(jobs[-1].is_finished)
+    assert [item['job_id'] for item in second.list()] == [job.id for job in reversed(jobs[2:])]
+    assert first.snapshot(running.id) is None
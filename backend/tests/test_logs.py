@@ -0,0 +1,64 @@
+from services.logs import LogStore
+
+def messages(entries):
+    return [entry['message'] for entry in entries]
+
+def test_latest_newest_first_with_cursor():
+    store = LogStore(capacity=100)
+    for i in range(5):
+        store.append('info', f'm{i}')
+    total, entries, cursor, has_more = store.query(limit=3)
+    assert total == 5
+    assert messages(entries) == ['m4', 'm3', 'm2']
+    assert cursor == 5
+    assert not has_more
+
+def test_since_id_pages_forward():
+    store = LogStore(capacity=100)
+    for i in range(10):
+        store.append('info', f'm{i}')
+    total, entries, cursor, has_more = store.query(limit=4, since_id=3)
+    assert messages(entries) == ['m6', 'm5', 'm4', 'm3']
+    assert cursor == 7
+    assert has_more
+    _, entries, cursor, has_more = store.query(limit=4, since_id=cursor)
+    assert messages(entries) == ['m9', 'm8', 'm7']
+    assert cursor == 10
+    assert not has_more
+    _, entries, cursor, has_more = store.query(limit=4, since_id=cursor)
+    assert entries == [] and cursor == 10 and not has_more
+
+def test_level_index():
+    store = LogStore(capacity=100)
+    for i in range(10):
+        store.append('error' if i % 3 == 0 else 'info', f'm{i}')
+    total, entries, _, _ = store.query(level='error', limit=10)
+    assert total == 4
+    assert messages(entries) == ['m9', 'm6', 'm3', 'm0']
+    _, entries, cursor, has_more = store.query(level='error', limit=2, since_id=1)
+    assert messages(entries) == ['m6', 'm3']
+    assert cursor == 7
+    assert has_more
+    assert store.query(level='warning') == (0, [], 10, False)
+
+def test_eviction_updates_totals_and_cursors():
+    store = LogStore(capacity=4)
+    for i in range(10):
+        store.append('error' if i % 2 else 'info', f'm{i}')
+    assert len(store) == 4
+    assert messages(store.entries()) == ['m6', 'm7', 'm8', 'm9']
+    total, entries, _, _ = store.query(level='error', limit=10)
+    assert total == 2
+    assert messages(entries) == ['m9', 'm7']
+    # 游标已被淘汰时从现存最旧的一条继续
+    _, entries, cursor, has_more = store.query(limit=2, since_id=1)
+    assert messages(entries) == ['m7', 'm6']
+    assert cursor == 8
+    assert has_more
+
+def test_listener_receives_appended_entries():
+    store = LogStore(capacity=10)
+    seen = []
+    store.add_listener(seen.append)
+    store.append_many([('info', 'a'), ('error', 'b')])
+    assert [entry['id'] for entry in seen] == [1, 2]
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import numpy as np
+
+from patterns.factory import ModelPool
+
+class FakeModel:
+    def __init__(self, size):
+        self.data = np.zeros(size, dtype=np.uint8)
+
+    def nbytes(self):
+        return self.data.nbytes
+
+def keys(pool):
+    return [(entry['task'], entry['dataset_id']) for entry in pool.stats()['entries']]
+
+def test_lru_evicts_least_recently_used_first():
+    pool = ModelPool(max_bytes=300)
+    for name in ('a', 'b', 'c'):
+        assert pool.put((name, None), FakeModel(100))
+    assert pool.get(('a', None)) is not None
+    pool.put(('d', None), FakeModel(100))
+    assert keys(pool) == [('c', None), ('a', None), ('d', None)]
+    pool.put(('e', None), FakeModel(200))
+    assert keys(pool) == [('d', None), ('e', None)]
+    stats = pool.stats()
+    assert stats['evictions'] == 3
+    assert stats['bytes'] == pool.nbytes() == 300
+
+def test_model_larger_than_budget_is_not_pooled():
+    pool = ModelPool(max_bytes=300)
+    pool.put(('a', None), FakeModel(100))
+    assert not pool.put(('a', None), FakeModel(400))
+    assert not pool.put(('b', None), FakeModel(400))
+    assert keys(pool) == []
+    assert pool.nbytes() == 0
+    assert pool.stats()['evictions'] == 0
+
+def test_pooled_arrays_become_read_only():
+    pool = ModelPool()
+    model = FakeModel(10)
+    pool.put(('a', None), model)
+    assert not model.data.flags.writeable
+
+def test_expired_entries_are_counted_and_rebuilt():
+    pool = ModelPool(ttl=0)
+    pool.put(('a', None), FakeModel(100))
+    assert pool.get(('a', None)) is None
+    stats = pool.stats()
+    assert (stats['expirations'], stats['misses'], stats['hits'], stats['bytes']) == (1, 1, 0, 0)
+    _, built = pool.build(('a', None), lambda: FakeModel(10))
+    assert built
+    _, built = pool.build(('a', None), lambda: FakeModel(10))
+    assert built
+
+def test_hits_and_misses():
+    pool = ModelPool()
+    assert pool.get(('a', None)) is None
+    pool.put(('a', None), FakeModel(10))
+    assert pool.get(('a', None)) is not None
+    stats = pool.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+def test_concurrent_builds_of_one_key_run_once():
+    pool = ModelPool()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def build():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return FakeModel(10)
+
+    def worker():
+        results.append(pool.build(('a', 1), build))
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    threads[0].start()
+    assert started.wait(5)
+    threads[1].start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(built for _, built in results) == [False, True]
+    assert results[0][0] is results[1][0]
+
+def test_discard_dataset_and_clear_release_build_locks():
+    pool = ModelPool()
+    for key in (('anomaly', 1), ('prediction', 1), ('anomaly', 2)):
+        pool.build(key, lambda: FakeModel(10))
+    pool.discard_dataset(1)
+    assert keys(pool) == [('anomaly', 2)]
+    assert list(pool._build_locks) == [('anomaly', 2)]
+    assert pool.nbytes() == 10
+    pool.clear()
+    assert keys(pool) == []
+    assert pool._build_locks == {}
+    assert pool.nbytes() == 0
@@ -0,0 +1,43 @@
+import tracemalloc
+
+import numpy as np
+
+from patterns.factory import ClassificationModel
+
+def test_classification_scales_only_integer_pixels():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(10, 4, 4, 3), dtype=np.uint8)
+    features = []
+    for data in (pixels, pixels / np.float32(255)):
+        model = ClassificationModel()
+        model.dataset = data
+        model.prepare(np.random.default_rng(0))
+        features.append(model.features)
+    np.testing.assert_allclose(features[0], features[1], rtol=1e-5)
+    assert 0 < features[1].max() <= 1
+
+def test_stage_allocations_are_traced(monkeypatch):
+    from patterns import factory
+    from patterns.factory import AIModelFactory
+    from patterns.strategy import AIContext
+
+    was_tracing = tracemalloc.is_tracing()
+    recorded = {}
+
+    def record(task, strategy, stage, seconds, allocated_bytes):
+        recorded[(task, stage)] = allocated_bytes
+
+    monkeypatch.setattr(factory, 'stage_recorder', None)
+    monkeypatch.setattr(factory, 'trace_allocations', False)
+    factory.set_stage_recorder(record, allocations=True)
+    try:
+        for task in ('classification', 'recommendation'):
+            AIModelFactory().create_model(task, warm=False).execute(AIContext('baseline', seed=0))
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    # 分类预处理的批缓冲区为 batch×224×224×3 的float32数组
+    batch_bytes = ClassificationModel.batch_size * 224 * 224 * 3 * 4
+    assert recorded[('classification', 'preprocess')] >= batch_bytes
+    assert recorded[('recommendation', 'preprocess')] > 0
+    assert recorded[('recommendation', 'inference')] > 0
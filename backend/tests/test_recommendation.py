@@ -0,0 +1,41 @@
+import numpy as np
+
+from engines.recommendation import IVFIndex, ItemIndex, build_index, normalize, top_k_rows
+
+def test_top_k_rows_sorted_per_row():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [3.0, 1.0, 2.0, 0.0]])
+    indices, values = top_k_rows(scores, 2)
+    assert indices.tolist() == [[1, 3], [0, 2]]
+    np.testing.assert_array_equal(values, [[0.9, 0.7], [3.0, 2.0]])
+    assert top_k_rows(scores, 0)[0].shape == (2, 0)
+
+def test_flat_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    items = rng.standard_normal((500, 8))
+    users = rng.standard_normal((7, 8))
+    indices, _ = ItemIndex(items, query_chunk=3).search(users, 5)
+    expected = np.argsort(-(normalize(users) @ normalize(items).T), axis=1)[:, :5]
+    assert indices.tolist() == expected.tolist()
+
+def test_ivf_never_pads_when_probed_lists_are_small():
+    rng = np.random.default_rng(1)
+    items = rng.standard_normal((40, 6))
+    index = IVFIndex(items, n_lists=10, n_probe=1)
+    indices, scores = index.search(rng.standard_normal((20, 6)), 10)
+    assert indices.shape == (20, 10)
+    assert (indices >= 0).all() and np.isfinite(scores).all()
+    assert all(len(set(row)) == 10 for row in indices.tolist())
+
+def test_ivf_with_all_lists_equals_flat_search():
+    rng = np.random.default_rng(2)
+    items = rng.standard_normal((2000, 10))
+    users = rng.standard_normal((16, 10))
+    ivf = IVFIndex(items, n_lists=20, n_probe=20)
+    assert ivf.search(users, 10)[0].tolist() == ItemIndex(items).search(users, 10)[0].tolist()
+
+def test_default_probes_scale_with_lists():
+    rng = np.random.default_rng(3)
+    index = build_index(rng.standard_normal((10000, 4)), ivf_threshold=5000)
+    assert index.kind == 'ivf'
+    assert index.n_lists == 100
+    assert index.n_probe == 10
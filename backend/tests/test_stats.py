@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from patterns.observer import Observer, StatsAggregator
+from services.history import HistoryStore
+
+class SlowObserver(Observer):
+    def update(self, result):
+        time.sleep(0.01)
+
+def entry(task, latency_ms):
+    return {'task': task, 'strategy': 'baseline', 'timestamp': 't', 'accuracy': 0.5, 'latency_ms': latency_ms, 'status': 'completed'}
+
+def test_aggregator_follows_evictions_within_one_batch():
+    # 批量写入超过容量时，新记录在添加到统计之前就被淘汰
+    store = HistoryStore(capacity=3)
+    aggregator = StatsAggregator()
+    store.add_listener(aggregator.remove)
+    for item in store.add_many([entry('prediction', 1.0) for _ in range(5)]):
+        aggregator.add(item)
+    assert aggregator.snapshot()['count'] == len(store) == 3
+    assert not aggregator._removed_early
+
+def test_early_removals_are_bounded():
+    aggregator = StatsAggregator()
+    for entry_id in range(StatsAggregator.MAX_EARLY_REMOVALS * 2):
+        aggregator.remove({'id': entry_id})
+    assert len(aggregator._removed_early) == StatsAggregator.MAX_EARLY_REMOVALS
+
+def test_percentiles_use_bucket_upper_bound():
+    aggregator = StatsAggregator()
+    for entry_id, latency in enumerate([1.0] * 90 + [100.0] * 10):
+        aggregator.add(dict(entry('prediction', latency), id=entry_id))
+    latency = aggregator.snapshot()['latency_ms']
+    assert 1.0 <= latency['p50'] < 1.25
+    assert 100.0 <= latency['p99'] < 125.0
+    assert StatsAggregator.percentiles([0] * (len(StatsAggregator.LATENCY_BOUNDS) + 1), 0)['p50'] is None
+
+def test_stats_match_history_when_observer_queue_drops(monkeypatch):
+    import app as backend
+
+    if backend.stats_aggregator is None:
+        pytest.skip('持久化存储后端由数据库聚合统计')
+    slow = SlowObserver()
+    monkeypatch.setattr(backend.result_subject, 'queue_size', 2)
+    monkeypatch.setattr(backend.result_subject, 'overflow', 'drop_oldest')
+    backend.result_subject.attach(slow)
+    try:
+        client = backend.app.test_client()
+        dropped = backend.result_subject.stats()['dropped']
+        for _ in range(20):
+            assert client.post('/api/run', json={'task': 'anomaly'}).status_code == 200
+        assert backend.result_subject.stats()['dropped'] > dropped
+        history_total = client.get('/api/history').get_json()['total']
+        assert client.get('/api/stats').get_json()['total_executions'] == history_total
+    finally:
+        backend.result_subject.detach(slow)
+        backend.result_subject.flush()
@@ -0,0 +1,179 @@
+import random
+
+import pytest
+
+from patterns.observer import StatsAggregator
+from services.storage import SQLiteStorage
+
+def entry(task='prediction', strategy='baseline', accuracy=0.9, latency_ms=1.0, status='completed'):
+    return {
+        'task': task,
+        'strategy': strategy,
+        'timestamp': '2024-01-01T00:00:00',
+        'accuracy': accuracy,
+        'latency_ms': latency_ms,
+        'status': status
+    }
+
+def ids(entries):
+    return [item['id'] for item in entries]
+
+def recount(entries):
+    # 从历史记录全量重算的统计，作为增量统计的对照
+    aggregator = StatsAggregator()
+    for item in entries:
+        aggregator.add(item)
+    return aggregator.snapshot()
+
+def assert_same_stats(actual, expected):
+    assert actual['count'] == expected['count']
+    assert actual['completed'] == expected['completed']
+    assert actual['avg_accuracy'] == pytest.approx(expected['avg_accuracy'])
+    assert actual['task_distribution'] == expected['task_distribution']
+    assert actual['strategy_distribution'] == expected['strategy_distribution']
+    assert actual['latency_ms'] == expected['latency_ms']
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'system.db')
+
+@pytest.fixture
+def storage(db_path):
+    storage = SQLiteStorage(db_path, history_capacity=5, log_capacity=4)
+    yield storage
+    storage.close()
+
+def test_history_page_delete_and_evict(storage):
+    removed = []
+    storage.history.add_listener(lambda item, reason: removed.append((item['id'], reason)))
+    storage.history.add_many([entry() for _ in range(7)])
+    assert len(storage.history) == 5
+    assert ids(storage.history.page(0, 3)) == [7, 6, 5]
+    assert ids(storage.history.page(3, 3)) == [4, 3]
+    assert removed == [(1, 'evict'), (2, 'evict')]
+
+    assert storage.history.delete(5)
+    assert not storage.history.delete(5)
+    assert removed[-1] == (5, 'delete')
+    assert ids(storage.history.page(0, 10)) == [7, 6, 4, 3]
+    assert storage.history.get(5) is None
+    assert storage.history.latest()['id'] == 7
+
+def test_log_since_id_cursor(storage):
+    for i in range(6):
+        storage.logs.append('error' if i % 2 else 'info', f'm{i}')
+    total, entries, cursor, has_more = storage.logs.query(limit=10)
+    assert total == 4
+    assert [item['message'] for item in entries] == ['m5', 'm4', 'm3', 'm2']
+    assert cursor == 6
+
+    _, entries, cursor, has_more = storage.logs.query(limit=1, since_id=3)
+    assert [item['message'] for item in entries] == ['m3']
+    assert cursor == 4
+    assert has_more
+    _, entries, cursor, has_more = storage.logs.query(level='error', limit=10, since_id=cursor)
+    assert [item['message'] for item in entries] == ['m5']
+    assert cursor == 6
+    assert not has_more
+
+def test_restart_keeps_history_logs_and_stats(db_path):
+    storage = SQLiteStorage(db_path)
+    storage.history.add_many([entry(task='anomaly'), entry(task='prediction'), entry(task='anomaly')])
+    storage.logs.append('info', '系统启动')
+    storage.close()
+
+    storage = SQLiteStorage(db_path)
+    storage.history.add_many([entry(task='prediction'), entry(task='classification')])
+    assert len(storage.history) == 5
+    assert ids(storage.history.page(0, 10)) == [5, 4, 3, 2, 1]
+    assert storage.logs.query(limit=10)[0] == 1
+    stats = storage.history.aggregate()
+    assert stats['count'] == 5
+    assert stats['task_distribution'] == {'anomaly': 2, 'prediction': 2, 'classification': 1}
+    storage.close()
+
+def test_ids_follow_write_order_between_processes(db_path):
+    # 两个存储实例模拟两个worker，ID在提交时分配，分页和淘汰都按写入顺序
+    first = SQLiteStorage(db_path, history_capacity=3)
+    second = SQLiteStorage(db_path, history_capacity=3)
+    stored = second.history.add_many([entry(task='b0')])
+    for i in range(3):
+        stored += first.history.add_many([entry(task=f'a{i}')])
+    assert ids(stored) == sorted(ids(stored))
+    assert [item['task'] for item in second.history.page(0, 10)] == ['a2', 'a1', 'a0']
+    assert first.history.latest()['task'] == 'a2'
+
+    second.history.add_many([entry(task='b1')])
+    assert [item['task'] for item in first.history.page(0, 10)] == ['b1', 'a2', 'a1']
+    assert first.history.aggregate()['count'] == 3
+    first.close()
+    second.close()
+
+def test_aggregate_matches_history_after_deletes_and_evictions(db_path):
+    storage = SQLiteStorage(db_path, history_capacity=40)
+    rng = random.Random(0)
+    for round_index in range(30):
+        stored = storage.history.add_many([
+            entry(
+                task=rng.choice(['prediction', 'anomaly', 'classification']),
+                strategy=rng.choice(['baseline', 'ensemble']),
+                accuracy=rng.random(),
+                latency_ms=rng.choice([None, rng.expovariate(0.05)]),
+                status=rng.choice(['completed', 'failed'])
+            )
+            for _ in range(3)
+        ])
+        if round_index % 4 == 0:
+            storage.history.delete(stored[0]['id'])
+    assert_same_stats(storage.history.aggregate(), recount(storage.history.entries()))
+    storage.close()
+
+def test_counters_are_rebuilt_for_existing_database(db_path):
+    storage = SQLiteStorage(db_path)
+    storage.history.add_many([entry(latency_ms=latency) for latency in (0.5, None, 12.0, 900.0)])
+    expected = storage.history.aggregate()
+    with storage.db.transaction() as conn:
+        conn.execute('DELETE FROM history_totals')
+        conn.execute('DELETE FROM history_counts')
+    storage.close()
+
+    storage = SQLiteStorage(db_path)
+    assert_same_stats(storage.history.aggregate(), expected)
+    storage.close()
+
+def test_log_counts_follow_pruning_and_rebuild(db_path):
+    storage = SQLiteStorage(db_path, log_capacity=5)
+    for i in range(12):
+        storage.logs.append(['info', 'warning', 'error'][i % 3], f'm{i}')
+    storage.flush()
+
+    def count_rows(level=None):
+        sql, params = ('SELECT COUNT(*) FROM logs WHERE level = ?', (level,)) if level else ('SELECT COUNT(*) FROM logs', ())
+        return storage.db.connection().execute(sql, params).fetchone()[0]
+
+    assert len(storage.logs) == count_rows() == 5
+    for level in ('info', 'warning', 'error', 'debug'):
+        assert storage.logs.query(level=level)[0] == count_rows(level)
+    assert storage.logs.query(since_id=10)[0] == 5
+    with storage.db.transaction() as conn:
+        conn.execute('DELETE FROM log_counts')
+    storage.close()
+
+    storage = SQLiteStorage(db_path, log_capacity=5)
+    assert len(storage.logs) == 5
+    assert storage.logs.query(level='error')[0] == count_rows('error')
+    storage.close()
+
+def test_kv_compare_and_set(storage):
+    assert storage.kv.compare_and_set('config', None, {'version': 1})
+    assert not storage.kv.compare_and_set('config', None, {'version': 2})
+    assert storage.kv.compare_and_set('config', {'version': 1}, {'version': 2})
+    assert storage.kv.get('config') == {'version': 2}
+
+def test_data_record_extra_fields_round_trip(storage):
+    record = storage.data_records.add({'name': 'a.csv', 'type': 'dataset', 'size': 0, 'created_at': 'now', 'status': 'uploading'})
+    updated = storage.data_records.update(record['id'], {'status': 'ready', 'shape': [3, 2]})
+    assert storage.data_records.get(record['id']) == updated
+    assert updated['shape'] == [3, 2]
+    assert storage.data_records.delete(record['id'])['status'] == 'ready'
+    assert storage.data_records.get(record['id']) is None
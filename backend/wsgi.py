@@ -0,0 +1,24 @@
+import os
+
+from app import add_log, app, resource_sampler
+from patterns.factory import AIModelFactory
+
+def preload():
+    # 在master进程中预热模型池，fork后各worker共享同一份只读数组(写时复制)
+    factory = AIModelFactory()
+    for task_type in AIModelFactory.models:
+        model = factory.create_model(task_type)
+        if not model.prepared:
+            model.prepare()
+
+def create_app(preload_models=True):
+    if preload_models:
+        preload()
+    add_log('info', f'系统启动(pid={os.getpid()})')
+    return app
+
+application = create_app(os.environ.get('PRELOAD_MODELS', '1') == '1')
+
+if __name__ == '__main__':
+    resource_sampler.ensure_running()
+    application.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -11,6 +11,8 @@ export const useSystemStore = defineStore('system', {
     isLoading: false,
     history: [],
     logs: [],
+    eventSource: null,
+    streamRetry: null,
     stats: {
       totalTasks: 4,
       completedTasks: 0,
@@ -66,11 +68,15 @@ export const useSystemStore = defineStore('system', {
       }
     },
 
-    async runModel(task, strategy) {
+    async runModel(task, strategy, seed = null, datasetId = null) {
       this.isLoading = true
       try {
-        const response = await axios.post('/api/run', { task, strategy })
+        const payload = { task, strategy }
+        if (seed !== null) payload.seed = seed
+        if (datasetId !== null) payload.dataset_id = datasetId
+        const response = await axios.post('/api/run', payload)
         this.latestResult = response.data.result
+        // 多worker部署时推送只来自SSE连接所在的worker，执行后始终重新拉取统计
         await this.fetchStats()
         return response.data
       } catch (error) {
@@ -81,6 +87,48 @@ export const useSystemStore = defineStore('system', {
       }
     },
 
+    async submitJob(task, strategy, seed = null) {
+      try {
+        const payload = { task, strategy }
+        if (seed !== null) payload.seed = seed
+        const response = await axios.post('/api/jobs', payload)
+        return response.data
+      } catch (error) {
+        console.error('Failed to submit job:', error)
+        throw error
+      }
+    },
+
+    async fetchJob(jobId) {
+      try {
+        const response = await axios.get(`/api/jobs/${jobId}`)
+        return response.data
+      } catch (error) {
+        console.error('Failed to fetch job:', error)
+        throw error
+      }
+    },
+
+    async cancelJob(jobId) {
+      try {
+        const response = await axios.post(`/api/jobs/${jobId}/cancel`)
+        return response.data
+      } catch (error) {
+        console.error('Failed to cancel job:', error)
+        throw error
+      }
+    },
+
+    async appendPredictionPoints(points) {
+      try {
+        const response = await axios.post('/api/prediction/points', { points })
+        return response.data
+      } catch (error) {
+        console.error('Failed to append prediction points:', error)
+        throw error
+      }
+    },
+
     async fetchResults() {
       try {
         const response = await axios.get('/api/results')
@@ -123,12 +171,16 @@ export const useSystemStore = defineStore('system', {
       }
     },
 
-    async fetchLogs(level = null, limit = 50) {
+    async fetchLogs(level = null, limit = 50, sinceId = null) {
       try {
         const response = await axios.get('/api/logs', {
-          params: { level, limit }
+          params: { level, limit, since_id: sinceId }
         })
-        this.logs = response.data.data
+        if (sinceId === null) {
+          this.logs = response.data.data
+        } else {
+          this.logs = [...response.data.data, ...this.logs].slice(0, limit)
+        }
         return response.data
       } catch (error) {
         console.error('Failed to fetch logs:', error)
@@ -146,9 +198,30 @@ export const useSystemStore = defineStore('system', {
       }
     },
 
-    async exportData(type = 'json') {
+    async uploadDataset(file, { name = file.name, format = 'csv', dtype = 'float32', header = false } = {}, chunkSize = 4 * 1024 * 1024) {
       try {
-        const response = await axios.post('/api/export', { type })
+        const created = await axios.post('/api/datasets', { name, format, dtype, header })
+        const datasetId = created.data.data.id
+        // 分块顺序上传，offset用于服务端校验和断点续传
+        for (let offset = 0; offset < file.size; offset += chunkSize) {
+          await axios.post(`/api/datasets/${datasetId}/chunks`, file.slice(offset, offset + chunkSize), {
+            params: { offset },
+            headers: { 'Content-Type': 'application/octet-stream' }
+          })
+        }
+        const response = await axios.post(`/api/datasets/${datasetId}/complete`)
+        return response.data.data
+      } catch (error) {
+        console.error('Failed to upload dataset:', error)
+        throw error
+      }
+    },
+
+    async exportData(type = 'json', options = {}) {
+      try {
+        const response = await axios.post('/api/export', { type, ...options }, {
+          responseType: type === 'json' ? 'json' : 'blob'
+        })
         return response.data
       } catch (error) {
         console.error('Failed to export data:', error)
@@ -156,6 +229,61 @@ export const useSystemStore = defineStore('system', {
       }
     },
 
+    subscribe() {
+      if (this.eventSource || this.streamRetry) return
+      // 浏览器断线后自动重连，并通过Last-Event-ID补发错过的事件
+      const source = new EventSource('/api/stream')
+      source.addEventListener('result', (event) => {
+        const result = JSON.parse(event.data)
+        this.latestResult = result
+        if (result.execution) {
+          // 推送可能晚于重新拉取的历史到达，按ID去重
+          const rest = this.history.filter((item) => item.id !== result.execution.id)
+          this.history = [result.execution, ...rest].slice(0, 10)
+        }
+      })
+      source.addEventListener('log', (event) => {
+        this.logs = [JSON.parse(event.data), ...this.logs].slice(0, 50)
+      })
+      source.addEventListener('stats', (event) => {
+        Object.assign(this.stats, JSON.parse(event.data))
+      })
+      source.addEventListener('history_removed', (event) => {
+        const { id } = JSON.parse(event.data)
+        this.history = this.history.filter((item) => item.id !== id)
+      })
+      source.addEventListener('reset', () => {
+        // 错过的事件超出服务端缓冲区，重新拉取全量数据
+        this.fetchResults()
+        this.fetchStats()
+        this.fetchLogs()
+        this.fetchHistory()
+      })
+      source.onerror = () => {
+        // 服务端连接数已满(503)时浏览器不会自动重连：暂时退回按需拉取，稍后再订阅
+        if (source.readyState !== EventSource.CLOSED) return
+        this.eventSource = null
+        this.streamRetry = setTimeout(() => {
+          this.streamRetry = null
+          this.fetchStats()
+          this.fetchLogs()
+          this.subscribe()
+        }, 30000)
+      }
+      this.eventSource = source
+    },
+
+    unsubscribe() {
+      if (this.streamRetry) {
+        clearTimeout(this.streamRetry)
+        this.streamRetry = null
+      }
+      if (this.eventSource) {
+        this.eventSource.close()
+        this.eventSource = null
+      }
+    },
+
     async fetchSystemStatus() {
       try {
         const response = await axios.get('/api/system/status')